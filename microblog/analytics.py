@@ -0,0 +1,162 @@
+# microblog_app/analytics.py
+from collections import Counter
+from datetime import datetime, timedelta
+import pandas as pd
+from sqlalchemy import text
+
+# Column types for v_post_analytics; the author is repeated on every post,
+# so a categorical stores each username once
+POST_ANALYTICS_DTYPES = {
+    'id': 'int64',
+    'user_id': 'int32',
+    'author_username': 'category',
+    'content_length': 'int32'
+}
+
+def read_post_analytics(connection):
+    """
+    Load posts for analytics as a narrow, typed DataFrame.
+    Reads v_post_analytics (id, user_id, author_username, date_posted,
+    content_length) so post bodies never leave the database.
+    """
+    return pd.read_sql(
+        "SELECT id, user_id, author_username, date_posted, content_length FROM v_post_analytics",
+        connection,
+        parse_dates=['date_posted'],
+        dtype=POST_ANALYTICS_DTYPES
+    )
+
+WEEKDAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+def _date_range_sql(column, start, end):
+    """SQL condition and params for an optional [start, end) range on a date column"""
+    conditions, params = [], {}
+    if start:
+        conditions.append(f"{column} >= :start")
+        params['start'] = start.strftime('%Y-%m-%d')
+    if end:
+        conditions.append(f"{column} < :end")
+        params['end'] = end.strftime('%Y-%m-%d')
+    return (" AND ".join(conditions) or "1 = 1"), params
+
+def activity_report_sql(session, start=None, end=None):
+    """
+    User activity report aggregated inside SQLite.
+    Time buckets are read from the hourly rollup (one row per active hour);
+    per-user totals come from user_stats when no range is given.
+    Returns (user_summary, activity_patterns, total_posts).
+    """
+    condition, params = _date_range_sql('bucket', start, end)
+    buckets = session.execute(text(f"""
+        SELECT substr(bucket, 1, 7) as month,
+               CAST(strftime('%w', substr(bucket, 1, 10)) AS INTEGER) as weekday,
+               CAST(substr(bucket, 12, 2) AS INTEGER) as hour,
+               posts
+        FROM post_rollup_hourly
+        WHERE {condition}
+    """), params).fetchall()
+    
+    if start or end:
+        condition, params = _date_range_sql('p.date_posted', start, end)
+        users = session.execute(text(f"""
+            SELECT u.username, COUNT(*) as post_count, SUM(LENGTH(p.content)) as total_content_length,
+                   date(MIN(p.date_posted)) as first_post, date(MAX(p.date_posted)) as latest_post
+            FROM post p JOIN user u ON u.id = p.user_id
+            WHERE {condition}
+            GROUP BY p.user_id
+            ORDER BY u.username
+        """), params).fetchall()
+    else:
+        users = session.execute(text("""
+            SELECT u.username, s.post_count, s.total_content_length,
+                   date(s.first_post_date) as first_post, date(s.last_post_date) as latest_post
+            FROM user_stats s JOIN user u ON u.id = s.user_id
+            WHERE s.post_count > 0
+            ORDER BY u.username
+        """)).fetchall()
+    
+    user_summary = [{
+        'username': row.username,
+        'avg_content_length': round(row.total_content_length / row.post_count, 2),
+        'total_content_length': row.total_content_length,
+        'post_count': row.post_count,
+        'first_post': row.first_post,
+        'latest_post': row.latest_post
+    } for row in users]
+    
+    by_weekday, by_hour, by_month = Counter(), Counter(), Counter()
+    for row in buckets:
+        by_weekday[WEEKDAY_NAMES[row.weekday]] += row.posts
+        by_hour[row.hour] += row.posts
+        by_month[row.month] += row.posts
+    
+    activity_patterns = {
+        'posts_by_weekday': dict(by_weekday.most_common()),
+        'posts_by_hour': dict(sorted(by_hour.items())),
+        'posts_by_month': dict(sorted(by_month.items()))
+    }
+    return user_summary, activity_patterns, sum(by_month.values())
+
+def activity_report_pandas(session, start=None, end=None):
+    """Same report computed in pandas from v_post_analytics (fallback path)"""
+    df = read_post_analytics(session.connection())
+    if start:
+        df = df[df['date_posted'] >= pd.Timestamp(start)]
+    if end:
+        df = df[df['date_posted'] < pd.Timestamp(end)]
+    if df.empty:
+        return [], {}, 0
+    
+    # Derive time buckets
+    df = df.assign(post_date=df['date_posted'].dt.date,
+                   post_month=df['date_posted'].dt.strftime('%Y-%m'),
+                   post_hour=df['date_posted'].dt.hour,
+                   post_weekday=df['date_posted'].dt.day_name())
+    
+    # User activity summary
+    user_summary = df.groupby('author_username', observed=True).agg({
+        'content_length': ['mean', 'sum', 'count'],
+        'post_date': ['min', 'max']
+    }).round(2)
+    
+    # Flatten column names
+    user_summary.columns = ['avg_content_length', 'total_content_length', 'post_count', 'first_post', 'latest_post']
+    user_summary = user_summary.reset_index().rename(columns={'author_username': 'username'})
+    
+    # Activity by time patterns
+    activity_patterns = {
+        'posts_by_weekday': df['post_weekday'].value_counts().to_dict(),
+        'posts_by_hour': df['post_hour'].value_counts().sort_index().to_dict(),
+        'posts_by_month': df['post_month'].value_counts().sort_index().to_dict()
+    }
+    return user_summary.to_dict('records'), activity_patterns, len(df)
+
+def build_activity_report(session, start=None, end=None):
+    """SQL aggregation first; fall back to pandas if the SQL path fails"""
+    try:
+        return activity_report_sql(session, start, end)
+    except Exception as e:
+        session.rollback()
+        print(f"Warning: SQL activity report failed, using pandas fallback: {e}")
+        return activity_report_pandas(session, start, end)
+
+def posts_by_month(session):
+    """Post counts per month from the daily rollup"""
+    rows = session.execute(text("""
+        SELECT substr(bucket, 1, 7) as month, SUM(posts) as posts
+        FROM post_rollup_daily
+        GROUP BY month
+        ORDER BY month
+    """)).fetchall()
+    return {row.month: row.posts for row in rows}
+
+def daily_activity(session, days=30):
+    """Posts and distinct authors per day over the last `days` days, from the daily rollup"""
+    since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    rows = session.execute(text("""
+        SELECT bucket, posts, distinct_authors
+        FROM post_rollup_daily
+        WHERE bucket >= :since
+        ORDER BY bucket
+    """), {'since': since}).fetchall()
+    return {row.bucket: {'posts': row.posts, 'authors': row.distinct_authors} for row in rows}
@@ -0,0 +1,157 @@
+# microblog_app/analytics_cache.py
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+import pandas as pd
+from sqlalchemy import text
+from analytics import daily_activity, posts_by_month
+from pagination import SQLITE_DATETIME_FORMAT
+from write_version import post_generation
+
+DEFAULT_TTL_SECONDS = 60
+FOLD_BATCH_SIZE = 5000
+
+class _PostAccumulator:
+    """Running post aggregates that can absorb new rows without re-reading old ones"""
+
+    def __init__(self, generation=0):
+        self.generation = generation  # post generation the folded rows belong to
+        self.watermark = 0  # highest post id folded in so far
+        self.total_posts = 0
+        self.total_length = 0
+        self.length_histogram = Counter()
+        self.posts_by_user = Counter()
+
+    def fold(self, rows):
+        for post_id, user_id, content_length in rows:
+            content_length = content_length or 0
+            self.total_posts += 1
+            self.total_length += content_length
+            self.length_histogram[content_length] += 1
+            self.posts_by_user[user_id] += 1
+            self.watermark = max(self.watermark, post_id)
+
+    def median_length(self):
+        """Median content length from the histogram, matching pandas' median"""
+        if not self.total_posts:
+            return None
+        lower_rank, upper_rank = (self.total_posts - 1) // 2, self.total_posts // 2
+        lower = upper = None
+        seen = 0
+        for length in sorted(self.length_histogram):
+            seen += self.length_histogram[length]
+            if lower is None and seen > lower_rank:
+                lower = length
+            if seen > upper_rank:
+                upper = length
+                break
+        return (lower + upper) / 2
+
+class AnalyticsCache:
+    """
+    Cached analytics dashboard data.
+    Results are served from memory for ttl seconds or until invalidate() is
+    called. A refresh folds in only posts newer than the last watermark; a
+    full rebuild happens only when posts were deleted (the post generation in
+    write_version moved, whichever process did it) or after reset().
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop everything; the next request rebuilds from scratch"""
+        # Under the lock so a refresh in progress can't publish a result built
+        # from the accumulator being discarded (or undo the invalidation)
+        with self._lock:
+            self._posts = None
+            self._result = None
+            self._computed_at = 0.0
+
+    def invalidate(self):
+        """Mark cached results stale; the next request refreshes incrementally"""
+        with self._lock:
+            self._computed_at = 0.0
+
+    def get(self, session):
+        """Return (analytics, users_data), refreshing if stale"""
+        with self._lock:
+            if self._result is None or time.monotonic() - self._computed_at > self.ttl:
+                self.misses += 1
+                self._result = self._refresh(session)
+                self._computed_at = time.monotonic()
+            else:
+                self.hits += 1
+            return self._result
+
+    def _refresh(self, session):
+        # Read before folding: a delete racing the fold then just costs one
+        # extra rebuild next time, never a missed one
+        generation = post_generation(session)
+        if self._posts is None or self._posts.generation != generation:
+            self._posts = _PostAccumulator(generation)
+        self._fold_new_posts(session)
+
+        users_df = pd.read_sql("SELECT * FROM v_user_stats", session.connection())
+        return self._build(session, users_df), users_df.to_dict('records') if not users_df.empty else []
+
+    def _fold_new_posts(self, session):
+        result = session.execute(text("""
+            SELECT id, user_id, LENGTH(content)
+            FROM post WHERE id > :watermark ORDER BY id
+        """), {'watermark': self._posts.watermark})
+        while True:
+            rows = result.fetchmany(FOLD_BATCH_SIZE)
+            if not rows:
+                break
+            self._posts.fold(rows)
+
+    def _build(self, session, users_df):
+        analytics = {}
+        posts = self._posts
+
+        if not users_df.empty:
+            analytics['user_stats'] = {
+                'total_users': len(users_df),
+                'avg_posts_per_user': round(users_df['post_count'].mean(), 2),
+                'median_posts_per_user': users_df['post_count'].median(),
+                'most_active_user': users_df.loc[users_df['post_count'].idxmax()]['username'] if users_df['post_count'].max() > 0 else 'None',
+                'users_with_posts': len(users_df[users_df['post_count'] > 0]),
+                'users_without_posts': len(users_df[users_df['post_count'] == 0])
+            }
+
+        if posts.total_posts:
+            lengths = posts.length_histogram
+            analytics['post_stats'] = {
+                'total_posts': posts.total_posts,
+                'avg_content_length': round(posts.total_length / posts.total_posts, 2),
+                'median_content_length': posts.median_length(),
+                'longest_post': max(lengths),
+                'shortest_post': min(lengths),
+                'posts_last_7_days': _count_posts_since(session, days=7),
+                'posts_last_30_days': _count_posts_since(session, days=30)
+            }
+
+            # Top authors
+            usernames = dict(zip(users_df['id'], users_df['username'])) if not users_df.empty else {}
+            analytics['top_authors'] = {
+                usernames.get(user_id, f'user {user_id}'): count
+                for user_id, count in posts.posts_by_user.most_common(5)
+            }
+
+            # Time series come from the daily rollup table, not raw posts
+            analytics['posts_by_month'] = posts_by_month(session)
+            analytics['posts_by_day'] = daily_activity(session, days=30)
+
+        return analytics
+
+def _count_posts_since(session, days):
+    """Count recent posts with a range scan on ix_post_date_posted_id"""
+    since = (datetime.now() - timedelta(days=days)).strftime(SQLITE_DATETIME_FORMAT)
+    return session.execute(text("SELECT COUNT(*) FROM post WHERE date_posted > :since"),
+                           {'since': since}).scalar()
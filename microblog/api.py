@@ -0,0 +1,146 @@
+# microblog_app/api.py
+import json
+from flask import Blueprint, Response, request
+from models import db
+from pagination import paginate_view, paginate_view_by_id, DEFAULT_PAGE_SIZE
+from http_cache import conditional_view
+from metrics import record_rows
+from sqlalchemy import text
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+
+try:
+    import orjson
+except ImportError:  # plain json works, just slower on large pages
+    orjson = None
+
+# Versioned read-only JSON API over the same views the HTML pages use.
+# Breaking changes go in a new blueprint (api_v2) so existing clients keep working.
+api_v1 = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+# Columns clients may request with ?fields=a,b,c (all of them by default)
+POST_FIELDS = ('id', 'title', 'content', 'date_posted', 'user_id',
+               'author_username', 'author_email', 'content_length')
+USER_FIELDS = ('id', 'username', 'email', 'post_count', 'first_post_date', 'last_post_date')
+SUMMARY_FIELDS = ('total_users', 'total_posts', 'posts_this_week', 'posts_today', 'top_contributor')
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def json_response(payload, status=200):
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, separators=(',', ':'), default=str)
+    return Response(body, status=status, mimetype='application/json')
+
+@api_v1.errorhandler(ApiError)
+def handle_api_error(error):
+    return json_response({'error': str(error)}, status=error.status)
+
+def _is_api_request():
+    return request.blueprint == api_v1.name or \
+        request.path == api_v1.url_prefix or request.path.startswith(api_v1.url_prefix + '/')
+
+# Unknown URLs and wrong methods fail during routing, before any blueprint is
+# chosen, so blueprint handlers never see them; these app-wide handlers answer
+# in JSON under /api/v1 and hand every other path back to Flask's HTML pages.
+@api_v1.app_errorhandler(NotFound)
+@api_v1.app_errorhandler(MethodNotAllowed)
+def handle_api_routing_error(error):
+    if not _is_api_request():
+        return error
+    response = json_response({'error': error.description}, status=error.code)
+    if isinstance(error, MethodNotAllowed) and error.valid_methods:
+        response.headers['Allow'] = ', '.join(sorted(error.valid_methods))
+    return response
+
+def select_fields(allowed, required=()):
+    """
+    Parse ?fields= into (fields to return, SQL column list).
+    required columns (e.g. pagination keys) are always selected but only
+    returned when asked for.
+    """
+    requested = request.args.get('fields')
+    if not requested:
+        fields = list(allowed)
+    else:
+        fields = [f.strip() for f in requested.split(',') if f.strip()]
+        unknown = [f for f in fields if f not in allowed]
+        if unknown:
+            raise ApiError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    columns = fields + [c for c in required if c not in fields]
+    return fields, ', '.join(columns)
+
+def _rows_to_dicts(rows, fields):
+    return [{field: row._mapping[field] for field in fields} for row in rows]
+
+def _post_page(where='', params=None):
+    fields, columns = select_fields(POST_FIELDS, required=('id', 'date_posted'))
+    page = paginate_view(db.session, 'v_post_summary', columns=columns, where=where, params=params,
+                         before=request.args.get('before'),
+                         after=request.args.get('after'),
+                         per_page=request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int))
+    record_rows(len(page.items))
+    return json_response({
+        'data': _rows_to_dicts(page.items, fields),
+        'cursors': {'older': page.older_cursor, 'newer': page.newer_cursor},
+    })
+
+def _find_user_id(username):
+    user_id = db.session.execute(text("SELECT id FROM user WHERE username = :username"),
+                                 {'username': username}).scalar()
+    if user_id is None:
+        raise ApiError(f"User {username} not found.", status=404)
+    return user_id
+
+@api_v1.route("/posts")
+@conditional_view
+def list_posts():
+    """Posts newest first; page with ?before=/?after= cursors"""
+    return _post_page()
+
+@api_v1.route("/posts/<int:post_id>")
+@conditional_view
+def get_post(post_id):
+    fields, columns = select_fields(POST_FIELDS)
+    row = db.session.execute(text(f"SELECT {columns} FROM v_post_summary WHERE id = :id"),
+                             {'id': post_id}).fetchone()
+    if row is None:
+        raise ApiError(f"Post {post_id} not found.", status=404)
+    return json_response({'data': _rows_to_dicts([row], fields)[0]})
+
+@api_v1.route("/users")
+@conditional_view
+def list_users():
+    """Users with their post stats in id order; page with ?after="""
+    fields, columns = select_fields(USER_FIELDS, required=('id',))
+    rows, next_cursor = paginate_view_by_id(db.session, 'v_user_stats', columns=columns,
+                                            after=request.args.get('after'),
+                                            per_page=request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int))
+    record_rows(len(rows))
+    return json_response({'data': _rows_to_dicts(rows, fields), 'cursors': {'next': next_cursor}})
+
+@api_v1.route("/users/<username>")
+@conditional_view
+def get_user(username):
+    fields, columns = select_fields(USER_FIELDS)
+    row = db.session.execute(text(f"SELECT {columns} FROM v_user_stats WHERE username = :username"),
+                             {'username': username}).fetchone()
+    if row is None:
+        raise ApiError(f"User {username} not found.", status=404)
+    return json_response({'data': _rows_to_dicts([row], fields)[0]})
+
+@api_v1.route("/users/<username>/posts")
+@conditional_view
+def list_user_posts(username):
+    """One user's posts newest first, served from ix_post_user_id_date_posted"""
+    return _post_page(where="user_id = :user_id", params={'user_id': _find_user_id(username)})
+
+@api_v1.route("/stats")
+def site_stats():
+    """Site totals; not cached because the weekly/daily counts move with the clock"""
+    fields, columns = select_fields(SUMMARY_FIELDS)
+    row = db.session.execute(text(f"SELECT {columns} FROM v_dashboard_summary")).fetchone()
+    return json_response({'data': _rows_to_dicts([row], fields)[0]})
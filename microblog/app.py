@@ -1,64 +1,98 @@
 # microblog_app/app.py
+import hashlib
 import os
-import tempfile
 from flask import Flask
 from models import db
 from routes import main
-from sqlalchemy import text
+from api import api_v1
+from migrations import apply_migrations, begin_schema_lock, create_tables, get_schema_meta, set_schema_meta
+from db_utils import DEFAULT_PRAGMAS, apply_connection_pragmas
+from analytics_cache import AnalyticsCache, DEFAULT_TTL_SECONDS
+from seeding import seed_db_command
+from rollups import rebuild_rollups_command
+from instrumentation import RequestProfiler, DEFAULT_SLOW_QUERY_MS
+from metrics import Metrics
+from http_cache import DEFAULT_CACHE_CONTROL
+from fragment_cache import FragmentCache, DEFAULT_MAX_ENTRIES as FRAGMENT_CACHE_SIZE
+from write_queue import PostWriteQueue, DEFAULT_MAX_BATCH, DEFAULT_MAX_DELAY_MS
+from sqlalchemy import event, text
+
+# Views are dropped and recreated only when this DDL changes (see create_database_views)
+DROP_VIEW_STATEMENTS = [
+    "DROP VIEW IF EXISTS v_user_stats",
+    "DROP VIEW IF EXISTS v_post_summary", 
+    "DROP VIEW IF EXISTS v_recent_posts",
+    "DROP VIEW IF EXISTS v_top_contributors",
+    "DROP VIEW IF EXISTS v_dashboard_summary",
+    "DROP VIEW IF EXISTS v_post_analytics"
+]
+
+VIEW_STATEMENTS = [
+    """CREATE VIEW v_user_stats AS
+       SELECT u.id, u.username, u.email, s.post_count as post_count,
+              s.last_post_date as last_post_date, s.first_post_date as first_post_date
+       FROM user_stats s JOIN user u ON u.id = s.user_id""",
+    
+    """CREATE VIEW v_post_summary AS
+       SELECT p.id, p.title, p.content, p.date_posted, p.user_id,
+              u.username as author_username, u.email as author_email, LENGTH(p.content) as content_length
+       FROM post p JOIN user u ON p.user_id = u.id""",
+    
+    """CREATE VIEW v_recent_posts AS
+       SELECT p.id, p.title, SUBSTR(p.content, 1, 100) as content_preview,
+              p.date_posted, u.username as author, LENGTH(p.content) as content_length
+       FROM post p JOIN user u ON p.user_id = u.id
+       WHERE p.date_posted >= datetime('now', '-30 days')""",
+    
+    """CREATE VIEW v_top_contributors AS
+       SELECT u.id, u.username, u.email, s.post_count as total_posts,
+              s.total_content_length * 1.0 / s.post_count as avg_post_length, s.last_post_date as latest_post
+       FROM user u JOIN user_stats s ON u.id = s.user_id
+       WHERE s.post_count > 0""",
+    
+    """CREATE VIEW v_dashboard_summary AS
+       SELECT (SELECT COUNT(*) FROM user) as total_users,
+              (SELECT COALESCE(SUM(post_count), 0) FROM user_stats) as total_posts,
+              (SELECT COUNT(*) FROM post WHERE date_posted >= datetime('now', '-7 days')) as posts_this_week,
+              (SELECT COUNT(*) FROM post WHERE date_posted >= datetime('now', '-1 day')) as posts_today,
+              (SELECT u.username FROM user u JOIN user_stats s ON u.id = s.user_id WHERE s.post_count > 0 ORDER BY s.post_count DESC LIMIT 1) as top_contributor""",
+    
+    # Narrow projection for pandas analytics: no post bodies or emails
+    """CREATE VIEW v_post_analytics AS
+       SELECT p.id, p.user_id, u.username as author_username, p.date_posted,
+              LENGTH(p.content) as content_length
+       FROM post p JOIN user u ON p.user_id = u.id"""
+]
+
+VIEW_FINGERPRINT_KEY = 'view_ddl_sha256'
+
+def view_fingerprint():
+    """Hash of the view DDL, stored in schema_meta to detect definition changes"""
+    return hashlib.sha256("\n".join(VIEW_STATEMENTS).encode("utf-8")).hexdigest()
 
 def create_database_views(app):
-    """Create database views automatically during initialization"""
+    """Create database views during initialization, skipping the rebuild if unchanged"""
+    fingerprint = view_fingerprint()
     with app.app_context():
         try:
-            # Drop existing views
-            drop_statements = [
-                "DROP VIEW IF EXISTS v_user_stats",
-                "DROP VIEW IF EXISTS v_post_summary", 
-                "DROP VIEW IF EXISTS v_recent_posts",
-                "DROP VIEW IF EXISTS v_top_contributors",
-                "DROP VIEW IF EXISTS v_dashboard_summary"
-            ]
+            if get_schema_meta(VIEW_FINGERPRINT_KEY) == fingerprint:
+                return
             
-            for stmt in drop_statements:
+            begin_schema_lock()
+            # Another worker may have rebuilt the views while we waited for the lock
+            if get_schema_meta(VIEW_FINGERPRINT_KEY) == fingerprint:
+                db.session.commit()
+                return
+            
+            # Drop existing views
+            for stmt in DROP_VIEW_STATEMENTS:
                 db.session.execute(text(stmt))
             
             # Create views
-            view_statements = [
-                """CREATE VIEW v_user_stats AS
-                   SELECT u.id, u.username, u.email, COUNT(p.id) as post_count,
-                          MAX(p.date_posted) as last_post_date, MIN(p.date_posted) as first_post_date
-                   FROM user u LEFT JOIN post p ON u.id = p.user_id
-                   GROUP BY u.id, u.username, u.email""",
-                
-                """CREATE VIEW v_post_summary AS
-                   SELECT p.id, p.title, p.content, p.date_posted, p.user_id,
-                          u.username as author_username, u.email as author_email, LENGTH(p.content) as content_length
-                   FROM post p JOIN user u ON p.user_id = u.id""",
-                
-                """CREATE VIEW v_recent_posts AS
-                   SELECT p.id, p.title, SUBSTR(p.content, 1, 100) as content_preview,
-                          p.date_posted, u.username as author, LENGTH(p.content) as content_length
-                   FROM post p JOIN user u ON p.user_id = u.id
-                   WHERE p.date_posted >= datetime('now', '-30 days')""",
-                
-                """CREATE VIEW v_top_contributors AS
-                   SELECT u.id, u.username, u.email, COUNT(p.id) as total_posts,
-                          AVG(LENGTH(p.content)) as avg_post_length, MAX(p.date_posted) as latest_post
-                   FROM user u LEFT JOIN post p ON u.id = p.user_id
-                   GROUP BY u.id, u.username, u.email
-                   HAVING COUNT(p.id) > 0""",
-                
-                """CREATE VIEW v_dashboard_summary AS
-                   SELECT (SELECT COUNT(*) FROM user) as total_users,
-                          (SELECT COUNT(*) FROM post) as total_posts,
-                          (SELECT COUNT(*) FROM post WHERE date_posted >= datetime('now', '-7 days')) as posts_this_week,
-                          (SELECT COUNT(*) FROM post WHERE date_posted >= datetime('now', '-1 day')) as posts_today,
-                          (SELECT username FROM user u JOIN post p ON u.id = p.user_id GROUP BY u.id ORDER BY COUNT(p.id) DESC LIMIT 1) as top_contributor"""
-            ]
-            
-            for stmt in view_statements:
+            for stmt in VIEW_STATEMENTS:
                 db.session.execute(text(stmt))
             
+            set_schema_meta(VIEW_FINGERPRINT_KEY, fingerprint)
             db.session.commit()
             print("Database views created successfully during initialization.")
             
@@ -66,36 +100,88 @@ def create_database_views(app):
             db.session.rollback()
             print(f"Warning: Could not create database views during initialization: {e}")
 
-def create_app():
+def register_sqlite_pragmas(app):
+    """Apply the configured PRAGMAs to every new SQLite connection in the pool"""
+    pragmas = app.config['SQLITE_PRAGMAS']
+    
+    @event.listens_for(db.engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_connection_pragmas(dbapi_connection, pragmas)
+
+def create_app(test_config=None):
     """Application factory function"""
     app = Flask(__name__)
     
-    # Create a temporary database file
-    db_fd, db_path = tempfile.mkstemp(suffix='.db')
-    os.close(db_fd)  # Close the file descriptor
+    # Persistent database file; override with MICROBLOG_DATABASE_PATH or test_config
+    default_db_path = os.path.join(app.instance_path, 'microblog.db')
+    db_path = os.environ.get('MICROBLOG_DATABASE_PATH', default_db_path)
     
     # Configure the app
     app.config['SECRET_KEY'] = 'your-secret-key-here'
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['DATABASE_PATH'] = db_path
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLITE_PRAGMAS'] = dict(DEFAULT_PRAGMAS)
+    app.config['ANALYTICS_CACHE_TTL'] = DEFAULT_TTL_SECONDS
+    app.config['SQL_PROFILING'] = os.environ.get('MICROBLOG_SQL_PROFILING') == '1'
+    app.config['HTTP_CACHE_CONTROL'] = DEFAULT_CACHE_CONTROL
+    app.config['FRAGMENT_CACHE_SIZE'] = FRAGMENT_CACHE_SIZE
+    app.config['FRAGMENT_CACHE_DIR'] = os.environ.get('MICROBLOG_FRAGMENT_CACHE_DIR')
+    app.config['SLOW_QUERY_MS'] = float(os.environ.get('MICROBLOG_SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS))
+    app.config['WRITE_QUEUE'] = os.environ.get('MICROBLOG_WRITE_QUEUE') == '1'
+    app.config['WRITE_QUEUE_MAX_BATCH'] = DEFAULT_MAX_BATCH
+    app.config['WRITE_QUEUE_MAX_DELAY_MS'] = float(os.environ.get('MICROBLOG_WRITE_QUEUE_MAX_DELAY_MS', DEFAULT_MAX_DELAY_MS))
+    if test_config:
+        app.config.update(test_config)
     
-    print(f"Using temp instance path: {os.path.dirname(db_path)}")
+    db_path = os.path.abspath(app.config['DATABASE_PATH'])
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', f'sqlite:///{db_path}')
+    
+    print(f"Using database: {db_path}")
     
     # Initialize database
     db.init_app(app)
     
-    # Register blueprints
+    # Per-process cache for the analytics dashboard
+    app.extensions['analytics_cache'] = AnalyticsCache(ttl=app.config['ANALYTICS_CACHE_TTL'])
+    
+    # Rendered dashboard widgets, keyed by write_version
+    app.extensions['fragment_cache'] = FragmentCache(max_entries=app.config['FRAGMENT_CACHE_SIZE'],
+                                                     directory=app.config['FRAGMENT_CACHE_DIR'])
+    
+    # Prometheus-format metrics served at /metrics
+    metrics = Metrics()
+    metrics.register_cache('analytics', app.extensions['analytics_cache'])
+    metrics.register_cache('fragments', app.extensions['fragment_cache'])
+    app.extensions['metrics'] = metrics
+    
+    # Register blueprints and CLI commands
     app.register_blueprint(main)
+    app.register_blueprint(api_v1)
+    app.cli.add_command(seed_db_command)
+    app.cli.add_command(rebuild_rollups_command)
     
-    # Create database tables and views
+    # Create database tables, apply pending migrations, then build views
     with app.app_context():
-        db.create_all()
+        register_sqlite_pragmas(app)
+        metrics.init_app(app, db.engine)
+        if app.config['SQL_PROFILING']:
+            profiler = RequestProfiler(slow_query_ms=app.config['SLOW_QUERY_MS'])
+            profiler.init_app(app, db.engine)
+            app.extensions['request_profiler'] = profiler
+        if app.config['WRITE_QUEUE']:
+            write_queue = PostWriteQueue(max_batch=app.config['WRITE_QUEUE_MAX_BATCH'],
+                                         max_delay_ms=app.config['WRITE_QUEUE_MAX_DELAY_MS'],
+                                         on_batch=metrics.observe_write_group)
+            write_queue.init_app(app, db.engine)
+            app.extensions['write_queue'] = write_queue
+        create_tables(app)
+        apply_migrations(app)
         create_database_views(app)
     
     return app
 
-# Create the app
-app = create_app()
-
+# No module-level instance: `flask run` finds the create_app factory itself,
+# WSGI servers use wsgi:app, and importing create_app doesn't boot an app.
 if __name__ == '__main__':
-    app.run(debug=True, port=5001)
\ No newline at end of file
+    create_app().run(debug=True, port=5001)
\ No newline at end of file
@@ -0,0 +1,283 @@
+# microblog_app/benchmark.py
+"""
+Route benchmarks at several data scales.
+
+    python benchmark.py --scales 10000,100000,1000000 --save-baseline baseline.json
+    python benchmark.py --scales 10000 --compare baseline.json
+
+Each scale gets its own database under --data-dir, seeded once with
+bulk_seed (fixed random seed, 100 posts per user) and reused while its post
+count matches. Seeding and measuring run in fresh processes, so peak RSS
+reflects serving the routes at that scale rather than earlier work.
+Requests go through the Flask test client: latency covers routing, queries,
+templates and reading the whole (streamed) body, but no network or WSGI server.
+"""
+import json
+import multiprocessing
+import os
+import platform
+import sqlite3
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import click
+
+DEFAULT_SCALES = (10_000, 100_000, 1_000_000)
+DEFAULT_ITERATIONS = 30
+DEFAULT_WARMUP = 3
+POSTS_PER_USER = 100
+SEED = 42
+# Slowdown (as a fraction of the baseline) tolerated before --compare fails
+DEFAULT_TOLERANCE = 0.25
+
+# name -> URL; {username} and {user_id} are filled with a seeded user
+ROUTES = {
+    'dashboard': '/dashboard?user_id={user_id}',
+    'user_profile': '/user/{username}',
+    'readonly_posts': '/views/posts',
+    'analytics_dashboard': '/analytics/dashboard',
+    'analytics_dashboard_uncached': '/analytics/dashboard',
+    'user_activity_report': '/analytics/user_report',
+    'export_analytics': '/analytics/export',
+    'export_users': '/admin/export_users',
+}
+# Routes timed with an app.extensions cache reset before every request;
+# otherwise warm numbers would only measure cache hits
+RESET_CACHE_BEFORE = {'analytics_dashboard_uncached': 'analytics_cache'}
+
+def database_path(data_dir, posts):
+    return os.path.join(os.path.abspath(data_dir), f'bench_{posts}.db')
+
+def seeded_post_count(path):
+    """Posts in an existing benchmark database, or None if it can't be read"""
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute("SELECT COALESCE(SUM(post_count), 0) FROM user_stats").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+def _load_app(path):
+    from app import create_app
+    return create_app({'DATABASE_PATH': path})
+
+def seed_scale(path, posts):
+    """Create (or recreate) the database for one scale; runs in a child process"""
+    from models import db
+    from seeding import bulk_seed
+    app = _load_app(path)
+    with app.app_context():
+        stats = bulk_seed(max(1, posts // POSTS_PER_USER), posts, seed=SEED)
+        db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+    return stats
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def measure_route(app, client, url, iterations, warmup, before_each=None):
+    """
+    Cold and warm latency, statement count and Python heap peak for one URL.
+    before_each, if given, runs untimed before every request.
+    """
+    from instrumentation import count_queries
+    from models import db
+    with app.app_context():
+        engine = db.engine
+
+    prepare = before_each or (lambda: None)
+
+    def fetch():
+        response = client.get(url)
+        body = response.get_data()  # drains streamed CSV responses
+        if response.status_code != 200:
+            raise click.ClickException(f"{url} returned {response.status_code}")
+        return len(body)
+
+    prepare()
+    started = time.perf_counter()
+    with count_queries(engine) as queries:
+        size = fetch()
+    cold_ms = (time.perf_counter() - started) * 1000
+
+    for _ in range(warmup):
+        prepare()
+        fetch()
+    prepare()
+    with count_queries(engine) as warm_queries:
+        fetch()
+
+    timings = []
+    for _ in range(iterations):
+        prepare()
+        started = time.perf_counter()
+        fetch()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    # Measured separately: tracemalloc slows everything it watches
+    prepare()
+    tracemalloc.start()
+    fetch()
+    peak_alloc = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'url': url,
+        'cold_ms': round(cold_ms, 2),
+        'p50_ms': round(percentile(timings, 0.50), 2),
+        'p90_ms': round(percentile(timings, 0.90), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'p99_ms': round(percentile(timings, 0.99), 2),
+        'max_ms': round(timings[-1], 2),
+        'mean_ms': round(sum(timings) / len(timings), 2),
+        'queries_cold': queries.count,
+        'queries': warm_queries.count,
+        'response_bytes': size,
+        'peak_alloc_mb': round(peak_alloc / (1024 * 1024), 2),
+    }
+
+def run_scale(path, routes, iterations, warmup):
+    """Benchmark every route against one database; runs in a child process"""
+    from models import db
+    from sqlalchemy import text
+    app = _load_app(path)
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        user_id, username = db.session.execute(text(
+            "SELECT u.id, u.username FROM user_stats s JOIN user u ON u.id = s.user_id "
+            "ORDER BY s.post_count DESC LIMIT 1")).one()
+    client = app.test_client()
+    results = {}
+    for name in routes:
+        url = ROUTES[name].format(user_id=user_id, username=username)
+        before_each = None
+        if name in RESET_CACHE_BEFORE:
+            before_each = app.extensions[RESET_CACHE_BEFORE[name]].reset
+        results[name] = measure_route(app, client, url, iterations, warmup, before_each)
+    return {'routes': results, 'peak_rss_mb': peak_rss_mb()}
+
+def _in_child(func, *args):
+    # spawn, not fork: each scale starts from a clean interpreter
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(func, args)
+
+def compare(results, baseline, tolerance):
+    """Human-readable regressions of results against a baseline run"""
+    regressions = []
+    for scale, current in results['scales'].items():
+        previous = baseline.get('scales', {}).get(scale)
+        if not previous:
+            continue
+        for name, stats in current['routes'].items():
+            before = previous['routes'].get(name)
+            if not before:
+                continue
+            for key in ('p50_ms', 'p95_ms'):
+                if stats[key] > before[key] * (1 + tolerance):
+                    regressions.append(f"{scale} {name} {key}: {before[key]} -> {stats[key]}")
+            if stats['queries'] > before['queries']:
+                regressions.append(f"{scale} {name} queries: {before['queries']} -> {stats['queries']}")
+        if current['peak_rss_mb'] and previous.get('peak_rss_mb') and \
+                current['peak_rss_mb'] > previous['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f"{scale} peak_rss_mb: {previous['peak_rss_mb']} -> {current['peak_rss_mb']}")
+    return regressions
+
+def print_table(scale, result):
+    click.echo(f"\n{scale} posts (peak RSS {result['peak_rss_mb']} MB)")
+    header = f"{'route':<30}{'cold':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}{'alloc MB':>10}"
+    click.echo(header)
+    click.echo('-' * len(header))
+    for name, stats in result['routes'].items():
+        click.echo(f"{name:<30}{stats['cold_ms']:>9}{stats['p50_ms']:>9}{stats['p95_ms']:>9}"
+                   f"{stats['p99_ms']:>9}{stats['queries']:>9}{stats['peak_alloc_mb']:>10}")
+
+def _parse_list(value, convert=str):
+    return [convert(item.strip()) for item in value.split(',') if item.strip()]
+
+@click.command()
+@click.option('--scales', default=','.join(str(s) for s in DEFAULT_SCALES), show_default=True,
+              help='Comma-separated post counts to benchmark.')
+@click.option('--routes', 'route_names', default=','.join(ROUTES), show_default=True,
+              help='Comma-separated route names.')
+@click.option('--iterations', default=DEFAULT_ITERATIONS, show_default=True, help='Timed requests per route.')
+@click.option('--warmup', default=DEFAULT_WARMUP, show_default=True, help='Untimed requests before timing.')
+@click.option('--data-dir', default=os.path.join('instance', 'benchmarks'), show_default=True,
+              help='Where the seeded databases are kept between runs.')
+@click.option('--reseed', is_flag=True, help='Recreate the databases even if they look current.')
+@click.option('--output', default=None, help='Write the results JSON here.')
+@click.option('--save-baseline', default=None, help='Write the results JSON as the new baseline.')
+@click.option('--compare', 'compare_path', default=None, help='Baseline JSON to check for regressions.')
+@click.option('--tolerance', default=DEFAULT_TOLERANCE, show_default=True,
+              help='Allowed latency/RSS growth over the baseline, as a fraction.')
+def main(scales, route_names, iterations, warmup, data_dir, reseed, output, save_baseline,
+         compare_path, tolerance):
+    """Benchmark the main routes at several database sizes."""
+    scales = _parse_list(scales, int)
+    route_names = _parse_list(route_names)
+    unknown = [name for name in route_names if name not in ROUTES]
+    if unknown:
+        raise click.BadParameter(f"unknown route(s) {', '.join(unknown)}; choose from {', '.join(ROUTES)}")
+    os.makedirs(data_dir, exist_ok=True)
+
+    results = {
+        'meta': {
+            'date': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'iterations': iterations,
+            'warmup': warmup,
+        },
+        'scales': {},
+    }
+    for posts in scales:
+        path = database_path(data_dir, posts)
+        if reseed or seeded_post_count(path) != posts:
+            click.echo(f"Seeding {posts} posts into {path}...", err=True)
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            stats = _in_child(seed_scale, path, posts)
+            click.echo(f"  done in {stats['seconds']}s", err=True)
+        click.echo(f"Benchmarking {posts} posts...", err=True)
+        result = _in_child(run_scale, path, route_names, iterations, warmup)
+        results['scales'][str(posts)] = result
+        print_table(posts, result)
+
+    for path in (output, save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            click.echo(f"Results written to {path}", err=True)
+
+    if compare_path:
+        with open(compare_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, tolerance)
+        if regressions:
+            click.echo("\nRegressions against baseline:")
+            for line in regressions:
+                click.echo(f"  {line}")
+            sys.exit(1)
+        click.echo("\nNo regressions against baseline.")
+
+if __name__ == '__main__':
+    main()
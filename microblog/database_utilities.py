@@ -1,5 +1,29 @@
-import squlite3 as sq
+import sqlite3 as sq
+import time
+from itertools import islice
 import blog_utililties as ul
+from db_utils import apply_connection_pragmas
+
+# rows per transaction; one commit (and fsync) per batch instead of per row
+DEFAULT_BATCH_SIZE = 1000
+
+# Legacy blog schema; BlogWriter and the add_* helpers write to these columns
+USERS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS users (
+        userId INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        active INTEGER NOT NULL DEFAULT 1,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )'''
+
+BLOG_POSTS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS blog_posts (
+        postId INTEGER PRIMARY KEY AUTOINCREMENT,
+        post_message TEXT NOT NULL,
+        postDate TEXT DEFAULT CURRENT_TIMESTAMP,
+        userId INTEGER,
+        FOREIGN KEY (userId) REFERENCES users(userId)
+    )'''
 
 def create_database(database_name:str):
     '''This function creates a database to support the blog application. 
@@ -7,72 +31,130 @@ def create_database(database_name:str):
         database_name: represents the database to use or create.
         
         returns:
-        table structure
+        True if the tables exist afterwards
         2025-AUG-06'''
     
     conn=None #if connection exists, close it   
     try:
-        with sq.connect(database=database_name) as conn:
-            print(f"Connected to database {database_name}")
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS blog_posts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    author TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+        conn = sq.connect(database=database_name)
+        print(f"Connected to database {database_name}")
+        with conn:
+            conn.execute(USERS_TABLE)
+            print("Table 'users' created successfully.")
+            conn.execute(BLOG_POSTS_TABLE)
             print("Table 'blog_posts' created successfully.")
 
-            #users table
-            sql_qry = ''' 
-                CREATE TABLE IF NOT EXISTS users (
-                    userId INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT NOT NULL UNIQUE,
-                    active INTEGER NOT NULL DEFAULT 1,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                );'''
-            
-            cursor.execute(sql_qry)
-            print("Table 'users' created successfully.")    
-            print(f"{sql_qry} executed successfully.")
-            print(f"************")
-            # Commit the changes
-            conn.commit()
-             #create blog_post table
-        sql_qry =''' CREATE TABLE IF NOT EXISTS blog_posts (
-             postId INTEGER PRIMARY KEY AUTOINCREMENT,
-             post_message TEXT NOT NULL,
-             postDate TEXT DEFAULT CURRENT_TIMESTAMP,
-             userId INTEGER,
-             FOREIGN KEY (userID) REFERENCES users(userId);'''
-        cursor.execute(sql_qry)
-        conn.commit()
-        print("Table 'blog_posts' created successfully.")
-        print(f"{sql_qry} executed successfully.")
-        print(f"************")
-    
-
-        
+        # Earlier versions of this function created blog_posts with
+        # (id, title, content, author); IF NOT EXISTS leaves such a table alone
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(blog_posts)")]
+        if 'post_message' not in columns:
+            print("Warning: table 'blog_posts' has an old layout without post_message/userId; "
+                  "drop or rename it and run create_database again.")
+            return False
+        return True
     except sq.Error as e:
         print(f"An error occurred while creating the database: {e}")
+        return False
     finally:
         if conn:
             conn.close()
             print(f"Connection to database {database_name} closed.")    
 
-    if __name__ == "__main__":
-        database_name = ul.get_env('.env', 'database_name')
-        if database_name:
-            create_database(database_name)
-        else:
-            print("Database name not found in environment variables.")
-  
+class BlogWriter:
+    '''Batched writer session for the users and blog_posts tables.
+    Opens one connection for the whole session and inserts iterables of rows
+    with executemany, one transaction per batch, printing throughput per batch.
+
+        with BlogWriter('blog.db') as writer:
+            writer.add_users(['alice', 'bob'])
+            writer.add_blog_posts([('hello', 1), ('hi', 2)])
+
+    Rows that violate a constraint (say a duplicate username) are skipped and
+    collected in writer.rejected; the rest of the import carries on.
+
+    parms:
+        database_name: represents the database to use.
+        batch_size: rows per transaction.
+        verbose: print a line per committed batch.
+        2026-OCT-17'''
+
+    def __init__(self, database_name:str, batch_size:int=DEFAULT_BATCH_SIZE, verbose:bool=True):
+        self.database_name = database_name
+        self.batch_size = batch_size
+        self.verbose = verbose
+        self.conn = None
+        self.rows_written = 0
+        self.seconds = 0.0
+        self.rejected = []  # (table, row, error) for rows that failed a constraint
+
+    def __enter__(self):
+        self.conn = sq.connect(database=self.database_name)
+        apply_connection_pragmas(self.conn)
+        print(f"Connected to database {self.database_name}")
+        return self
+
+    def __exit__(self, *exc):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+            rate = self.rows_written / self.seconds if self.seconds else 0
+            print(f"Connection to database {self.database_name} closed. "
+                  f"{self.rows_written} rows written in {self.seconds:.2f}s ({rate:,.0f} rows/s).")
+
+    def add_users(self, usernames) -> int:
+        '''Insert an iterable of usernames. returns rows committed.'''
+        return self._write('users', 'INSERT INTO users (username) VALUES (?)',
+                           ((username,) for username in usernames))
+
+    def add_blog_posts(self, posts) -> int:
+        '''Insert an iterable of (post_message, userId) pairs. returns rows committed.'''
+        return self._write('blog_posts', 'INSERT INTO blog_posts (post_message, userId) VALUES (?, ?)', posts)
+
+    def _write(self, table_name:str, sql_qry:str, rows) -> int:
+        if self.conn is None:
+            raise RuntimeError("BlogWriter must be used as a context manager")
+        committed = 0
+        rejected = 0
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            started = time.perf_counter()
+            try:
+                with self.conn:  # one transaction per batch
+                    self.conn.executemany(sql_qry, batch)
+                written = len(batch)
+            except sq.IntegrityError:
+                # e.g. a duplicate username: redo this batch row by row and
+                # keep the bad rows in self.rejected instead of stopping the import
+                written = 0
+                for row in batch:
+                    try:
+                        with self.conn:
+                            self.conn.execute(sql_qry, row)
+                        written += 1
+                    except sq.IntegrityError as e:
+                        self.rejected.append((table_name, row, str(e)))
+                        rejected += 1
+            except sq.Error as e:
+                print(f"An error occurred while adding to {table_name} after {committed} rows: {e}")
+                break
+            seconds = time.perf_counter() - started
+            committed += written
+            self.rows_written += written
+            self.seconds += seconds
+            if self.verbose:
+                rate = written / seconds if seconds else 0
+                print(f"  {table_name}: batch of {written} rows in {seconds:.3f}s ({rate:,.0f} rows/s)")
+        if rejected:
+            print(f"  {table_name}: {rejected} rows rejected (see BlogWriter.rejected)")
+        return committed
+
 #instead of a stored procedure, since sqlite doesn't have those
 def add_user(database_name:str, username:str):
     '''This function adds a user to the users table.
+    For more than a handful of users use BlogWriter, which keeps one connection open.
     parms:
         database_name: represents the database to use or create.
         username: represents the username to add.
@@ -80,38 +162,30 @@ def add_user(database_name:str, username:str):
         returns:
         user who was added  
         2025-AUG-06'''
-    
-    
-
-    try:
-        conn = None
-        with sq.connect(database=database_name) as conn:
-            cursor = conn.cursor()
-            sql_qry='INSERT INTO users (username) VALUES (?)', (username,)
-            username=(userName,)
-            cursor.execute((username, sql_qry))
-
-            
-
-            # Commit the changes
-            conn.commit()
+    with BlogWriter(database_name, verbose=False) as writer:
+        if writer.add_users([username]):
             print(f"User '{username}' added successfully.")
-    except sq.Error as e:
-        print(f"An error occurred while adding the user: {e}")
-    finally:
-        if conn:
-            conn.close()
-            print(f"Connection to database {database_name} closed.")
+            return username
 
 def add_blog_post(database_name:str, 
                   post_message:str,
                   userID:int):
     
     '''This function adds a blog post to the blog_posts table.
+    For more than a handful of posts use BlogWriter, which keeps one connection open.
     parms:
         database_name: represents the database to use or create.
         post_message: represents the content of the blog post.
         userID: represents the user ID of the author of the blog post.
         returns:
-        
-        '''
\ No newline at end of file
+        number of posts added
+        '''
+    with BlogWriter(database_name, verbose=False) as writer:
+        return writer.add_blog_posts([(post_message, userID)])
+
+if __name__ == "__main__":
+    database_name = ul.get_env('.env', 'database_name')
+    if database_name:
+        create_database(database_name)
+    else:
+        print("Database name not found in environment variables.")
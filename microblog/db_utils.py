@@ -6,8 +6,166 @@ Safe for use with Flask or other frameworks.
 """
 
 from __future__ import annotations
+import logging
 import sqlite3 as sq
-from typing import Any, List, Optional, Tuple
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Connection settings tuned for concurrent readers alongside a single writer
+DEFAULT_PRAGMAS = {
+    "busy_timeout": 5000,        # ms to wait on a locked database; first so the rest can wait too
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,        # negative = KiB, so ~64 MB of page cache
+    "mmap_size": 268435456,      # 256 MB memory-mapped I/O
+    "foreign_keys": "ON",
+}
+
+# Rows pulled per fetchmany() round trip when streaming
+DEFAULT_FETCH_BATCH_SIZE = 1000
+# Rows written per transaction by execute_many/bulk_insert
+DEFAULT_WRITE_BATCH_SIZE = 5000
+
+def apply_connection_pragmas(connection: Any, pragmas: Optional[dict] = None) -> None:
+    """
+    Apply PRAGMA settings to a raw DB-API SQLite connection.
+    Works for sqlite3 connections and SQLAlchemy's connect-event connections.
+    """
+    cur = connection.cursor()
+    try:
+        for name, value in (pragmas or DEFAULT_PRAGMAS).items():
+            cur.execute(f"PRAGMA {name}={value}")
+    finally:
+        cur.close()
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of SQLite connections for scripts and CLI tools.
+    Connections get the PRAGMAs once when created and a cheap health check on
+    each checkout. A thread that already holds a connection gets the same one
+    back, so helpers can nest without deadlocking the pool. Keeping
+    connections open also keeps sqlite3's per-connection statement cache warm.
+    """
+
+    def __init__(self, database_name: str, max_size: int = 5, pragmas: Optional[dict] = None,
+                 timeout: float = 30.0, cached_statements: int = 256):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.database_name = database_name
+        self.max_size = max_size
+        self.pragmas = pragmas
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._idle: List[sq.Connection] = []
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._created = 0
+        self._closed = False
+
+    def _connect(self) -> sq.Connection:
+        # check_same_thread=False: a connection may serve different threads, one at a time
+        conn = sq.connect(self.database_name, check_same_thread=False,
+                          cached_statements=self.cached_statements)
+        conn.row_factory = sq.Row
+        apply_connection_pragmas(conn, self.pragmas)
+        with self._lock:
+            self._created += 1
+        return conn
+
+    @staticmethod
+    def _is_healthy(conn: sq.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return not conn.in_transaction
+        except sq.Error:
+            return False
+
+    def acquire(self) -> sq.Connection:
+        """Check out a connection, blocking up to timeout seconds if all are in use."""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+        if self._closed:
+            raise sq.ProgrammingError("Connection pool is closed")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sq.OperationalError(f"No pooled connection free after {self.timeout}s")
+        try:
+            conn = None
+            while conn is None:
+                with self._lock:
+                    candidate = self._idle.pop() if self._idle else None
+                if candidate is None:
+                    conn = self._connect()
+                elif self._is_healthy(candidate):
+                    conn = candidate
+                else:
+                    logging.warning("Discarding unhealthy pooled SQLite connection")
+                    safe_close_connection(candidate)
+        except Exception:
+            self._slots.release()
+            raise
+        self._local.conn, self._local.depth = conn, 1
+        return conn
+
+    def release(self, conn: sq.Connection) -> None:
+        """Return a connection taken with acquire()."""
+        if getattr(self._local, "conn", None) is not conn:
+            raise ValueError("Connection was not checked out by this thread")
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()  # never hand the next caller a half-finished transaction
+        with self._lock:
+            if self._closed:
+                safe_close_connection(conn)
+            else:
+                self._idle.append(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[sq.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"max_size": self.max_size, "idle": len(self._idle), "created": self._created}
+
+    def close(self) -> None:
+        """Close idle connections; ones still checked out close when released."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            safe_close_connection(conn)
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+# Helpers below accept either a plain connection or a ConnectionPool
+ConnectionSource = Union[sq.Connection, ConnectionPool]
+
+@contextmanager
+def borrow_connection(source: ConnectionSource) -> Iterator[sq.Connection]:
+    """Yield a usable connection from a connection or a pool."""
+    if isinstance(source, ConnectionPool):
+        with source.connection() as conn:
+            yield conn
+    else:
+        yield source
 
 def create_database_connection(database_name: str) -> Optional[sq.Connection]:
     """Create a new SQLite database connection."""
@@ -31,18 +189,19 @@ def safe_close_connection(connection: Optional[sq.Connection]) -> None:
             logging.warning(f"Error closing database connection: {e}")
 
 def execute_query(
-    connection: sq.Connection,
+    connection: ConnectionSource,
     query: str,
     params: Optional[tuple] = None,
     fetch_type: str = "none"
 ) -> Any:
     """
     Execute an SQL query safely with error handling.
+    connection: a sqlite3 connection or a ConnectionPool.
     fetch_type: 'none', 'one', or 'all'
     """
     try:
-        with connection:  # handles commit/rollback automatically
-            cur = connection.cursor()
+        with borrow_connection(connection) as conn, conn:  # conn handles commit/rollback
+            cur = conn.cursor()
             cur.execute(query, params or ())
             if fetch_type == "one":
                 return cur.fetchone()
@@ -55,7 +214,7 @@ def execute_query(
         logging.error(f"Database error: {e} | Query: {query}")
         return None
 
-def table_exists(connection: sq.Connection, table_name: str) -> bool:
+def table_exists(connection: ConnectionSource, table_name: str) -> bool:
     """Return True if the specified table exists."""
     result = execute_query(
         connection,
@@ -65,7 +224,7 @@ def table_exists(connection: sq.Connection, table_name: str) -> bool:
     )
     return result is not None
 
-def database_is_ready(connection: Optional[sq.Connection], table_name: str) -> bool:
+def database_is_ready(connection: Optional[ConnectionSource], table_name: str) -> bool:
     """
     Check if a database connection exists and contains a table.
     UI should handle messaging if False is returned.
@@ -74,7 +233,7 @@ def database_is_ready(connection: Optional[sq.Connection], table_name: str) -> b
         return False
     return table_exists(connection, table_name)
 
-def get_all_records(connection: sq.Connection, table_name: str, order_by: str | None = None) -> List[sq.Row]:
+def get_all_records(connection: ConnectionSource, table_name: str, order_by: str | None = None) -> List[sq.Row]:
     """Return all rows from a table, optionally ordered."""
     query = f"SELECT * FROM {table_name}"
     if order_by:
@@ -82,12 +241,12 @@ def get_all_records(connection: sq.Connection, table_name: str, order_by: str |
         query += f" ORDER BY {order_by}"
     return execute_query(connection, query, fetch_type="all") or []
 
-def get_record_by_id(connection: sq.Connection, table_name: str, id_column: str, record_id: Any) -> Optional[sq.Row]:
+def get_record_by_id(connection: ConnectionSource, table_name: str, id_column: str, record_id: Any) -> Optional[sq.Row]:
     """Return a single row by ID."""
     query = f"SELECT * FROM {table_name} WHERE {id_column} = ?"
     return execute_query(connection, query, (record_id,), fetch_type="one")
 
-def get_column_values(connection: sq.Connection, table_name: str, column_name: str, order_by: str | None = None) -> List[Any]:
+def get_column_values(connection: ConnectionSource, table_name: str, column_name: str, order_by: str | None = None) -> List[Any]:
     """Return all values from one column."""
     query = f"SELECT {column_name} FROM {table_name}"
     if order_by:
@@ -95,8 +254,137 @@ def get_column_values(connection: sq.Connection, table_name: str, column_name: s
     rows = execute_query(connection, query, fetch_type="all") or []
     return [row[0] for row in rows]
 
-def record_exists(connection: sq.Connection, table_name: str, id_column: str, record_id: Any) -> bool:
+def record_exists(connection: ConnectionSource, table_name: str, id_column: str, record_id: Any) -> bool:
     """Return True if a record with this ID exists."""
     query = f"SELECT 1 FROM {table_name} WHERE {id_column} = ? LIMIT 1"
     result = execute_query(connection, query, (record_id,), fetch_type="one")
     return result is not None
+
+def fetch_page(
+    connection: ConnectionSource,
+    table_name: str,
+    key_column: str,
+    after: Any = None,
+    limit: int = 10,
+    columns: str = "*"
+) -> Tuple[List[sq.Row], Any]:
+    """
+    Keyset page: up to limit rows with key_column > after, in key order.
+    key_column must be unique, indexed and part of columns. Returns
+    (rows, key of the last row), the key being None once a short page is hit.
+    Cost depends on the page size, not on how deep into the table it is.
+    """
+    query = f"SELECT {columns} FROM {table_name}"
+    params: tuple = ()
+    if after is not None:
+        query += f" WHERE {key_column} > ?"
+        params = (after,)
+    query += f" ORDER BY {key_column} LIMIT ?"
+    rows = execute_query(connection, query, params + (limit,), fetch_type="all") or []
+    next_key = rows[-1][key_column] if len(rows) == limit else None
+    return rows, next_key
+
+def estimate_row_count(connection: ConnectionSource, table_name: str) -> Optional[int]:
+    """
+    Approximate row count without a full COUNT(*) scan: the ANALYZE figure
+    from sqlite_stat1 when present, else MAX(rowid), which is an index seek
+    (over-counts after deletes). None if neither is available.
+    """
+    if table_exists(connection, "sqlite_stat1"):
+        row = execute_query(connection, "SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1",
+                            (table_name,), fetch_type="one")
+        if row and row[0]:
+            return int(row[0].split()[0])
+    row = execute_query(connection, f"SELECT MAX(rowid) FROM {table_name}", fetch_type="one")
+    return (row[0] or 0) if row else None
+
+# --- Streaming reads and batched writes ---
+# Unlike the helpers above, these log and then re-raise: a silently
+# truncated stream or a half-finished load is worse than an exception.
+
+def iter_query(
+    connection: ConnectionSource,
+    query: str,
+    params: Optional[tuple] = None,
+    batch_size: int = DEFAULT_FETCH_BATCH_SIZE
+) -> Iterator[sq.Row]:
+    """
+    Yield rows from a SELECT, fetching batch_size at a time.
+    Memory stays flat however many rows match. A pooled connection is held
+    until the generator is exhausted or closed.
+    """
+    with borrow_connection(connection) as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(query, params or ())
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        except sq.Error as e:
+            logging.error(f"Database error: {e} | Query: {query}")
+            raise
+        finally:
+            cur.close()
+
+def iter_records(
+    connection: ConnectionSource,
+    table_name: str,
+    order_by: str | None = None,
+    batch_size: int = DEFAULT_FETCH_BATCH_SIZE
+) -> Iterator[sq.Row]:
+    """Streaming counterpart of get_all_records."""
+    query = f"SELECT * FROM {table_name}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    return iter_query(connection, query, batch_size=batch_size)
+
+def _chunks(rows: Iterable[Sequence[Any]], size: int) -> Iterator[List[Sequence[Any]]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def execute_many(
+    connection: ConnectionSource,
+    query: str,
+    rows: Iterable[Sequence[Any]],
+    batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    on_batch: Optional[Callable[[int, float], None]] = None
+) -> int:
+    """
+    Run a parameterised write for every row, batch_size rows per transaction.
+    rows may be any iterable (e.g. a generator) and is consumed lazily.
+    Batches committed before an error stay committed. on_batch, if given, is
+    called with (rows, seconds) after each commit. Returns rows written.
+    """
+    total = 0
+    with borrow_connection(connection) as conn:
+        for chunk in _chunks(rows, batch_size):
+            started = time.perf_counter()
+            try:
+                with conn:  # one transaction, one commit per chunk
+                    conn.executemany(query, chunk)
+            except sq.Error as e:
+                logging.error(f"Database error after {total} rows: {e} | Query: {query}")
+                raise
+            total += len(chunk)
+            if on_batch is not None:
+                on_batch(len(chunk), time.perf_counter() - started)
+    return total
+
+def bulk_insert(
+    connection: ConnectionSource,
+    table_name: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    on_batch: Optional[Callable[[int, float], None]] = None
+) -> int:
+    """Insert rows (tuples in columns order) in chunked transactions. Returns rows inserted."""
+    placeholders = ", ".join("?" for _ in columns)
+    query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+    return execute_many(connection, query, rows, batch_size=batch_size, on_batch=on_batch)
@@ -4,10 +4,20 @@ display_utils.py
 Helpers for rendering tabular data in a CLI.
 """
 
+import sqlite3 as sq
 from cli_utils import clear_screen
+from db_utils import estimate_row_count, fetch_page
 
-def display_records(records, headers=None, title="Records", show_count=True, page_size=10, enable_paging=True) -> int:
-    """Display records in pages. Returns total records shown."""
+def display_records(records, headers=None, title="Records", show_count=True, page_size=10,
+                    enable_paging=True, total_estimate=None) -> int:
+    """
+    Display records in pages. Returns total records shown.
+    records is either a list, or a page-fetch callback fetch(after, limit) ->
+    (rows, next_key) such as a wrapped db_utils.fetch_page; the callback
+    form loads one page at a time (see display_table).
+    """
+    if callable(records):
+        return _display_lazy_pages(records, headers, title, page_size, total_estimate)
     if not records:
         print(f'No {title.lower()} found')
         return 0
@@ -37,6 +47,66 @@ def display_records(records, headers=None, title="Records", show_count=True, pag
         elif choice == 'L': current_page = total_pages
     return total_records
 
+def display_table(connection, table_name, key_column, headers=None, title=None, columns="*", page_size=10) -> int:
+    """Browse a table of any size, fetching only the page on screen via keyset paging."""
+    def fetch(after, limit):
+        return fetch_page(connection, table_name, key_column, after, limit, columns)
+    return display_records(fetch, headers, title or table_name, page_size=page_size,
+                           total_estimate=estimate_row_count(connection, table_name))
+
+def _display_lazy_pages(fetch, headers, title, page_size, total_estimate=None) -> int:
+    """
+    Page through fetch() results. Keyset cursors for visited pages are kept so
+    Prev/First need no OFFSET; only the current page and its neighbours stay
+    in memory. The next page is fetched right after the current one is drawn,
+    so it is ready by the time the user presses N.
+    """
+    cursors = [None]  # cursors[i] is the 'after' key that starts page i
+    pages = {}
+    shown = {}
+
+    def load(index):
+        if index not in pages:
+            pages[index] = fetch(cursors[index], page_size)
+        return pages[index]
+
+    approx_pages = None
+    if total_estimate:
+        approx_pages = max(1, (total_estimate + page_size - 1) // page_size)
+
+    current = 0
+    while True:
+        rows, next_key = load(current)
+        if current == 0 and not rows:
+            print(f'No {title.lower()} found')
+            return 0
+        shown[current] = len(rows)
+
+        clear_screen()
+        of_pages = f" of ~{approx_pages}" if approx_pages else ""
+        print(f"\n{title} (Page {current + 1}{of_pages}):\n")
+        _print_table(rows, headers)
+        start = current * page_size
+        of_total = f" of ~{total_estimate}" if total_estimate else ""
+        print(f"\nShowing records {start + 1}-{start + len(rows)}{of_total}", flush=True)
+
+        has_next = False
+        if next_key is not None:
+            if len(cursors) == current + 1:
+                cursors.append(next_key)
+            has_next = bool(load(current + 1)[0])  # prefetch
+        for index in list(pages):
+            if abs(index - current) > 1:
+                del pages[index]
+
+        print("Options: [P]rev [N]ext [F]irst [Q]uit")
+        choice = input("Choice: ").strip().upper()
+        if choice == 'Q': break
+        elif choice == 'N' and has_next: current += 1
+        elif choice == 'P' and current > 0: current -= 1
+        elif choice == 'F': current = 0
+    return sum(shown.values())
+
 def _display_records_page(records, headers, title, show_count, total_records=None) -> int:
     """Helper for single-page display."""
     if total_records is None:
@@ -54,7 +124,7 @@ def _print_table(records, headers):
         print("-" * len(header_row))
     for idx, record in enumerate(records, start=1):
         try:
-            if isinstance(record, (tuple, list)):
+            if isinstance(record, (tuple, list, sq.Row)):
                 row = f"{str(idx).ljust(4)} | " + " | ".join(str(f).ljust(15) for f in record)
             else:
                 row = f"{str(idx).ljust(4)} | {str(record).ljust(15)}"
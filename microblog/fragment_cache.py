@@ -0,0 +1,104 @@
+# microblog_app/fragment_cache.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 128
+
+class FragmentCache:
+    """
+    Rendered page fragments (or the small values they are built from), keyed
+    by name and the database write_version token (which includes the
+    database's random id). A write bumps the token, so entries never need
+    explicit invalidation; stale ones simply stop being asked for and fall
+    out of the LRU.
+    With a directory, entries are also stored as JSON files so other worker
+    processes and restarts can reuse them.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get_or_render(self, name, version, render):
+        """Return the cached value for (name, version), calling render() on a miss"""
+        key = (name, version)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        value = self._read_file(name, version)
+        if value is None:
+            value = render()
+            self._write_file(name, version, value)
+            with self._lock:
+                self.misses += 1
+        else:
+            with self._lock:
+                self.hits += 1
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.directory:
+            for filename in os.listdir(self.directory):
+                if filename.endswith('.json'):
+                    _remove_quietly(os.path.join(self.directory, filename))
+
+    # --- optional on-disk backend ---
+
+    def _path(self, name, version):
+        digest = hashlib.sha1(version.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f'{name}-{digest}.json')
+
+    def _read_file(self, name, version):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(name, version), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_file(self, name, version, value):
+        if not self.directory:
+            return
+        path = self._path(name, version)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)  # atomic, so readers never see a partial file
+        except (OSError, TypeError) as e:
+            print(f"Warning: Could not write fragment cache file {path}: {e}")
+            return
+        # Older versions of this fragment can never be requested again
+        prefix = f'{name}-'
+        for filename in os.listdir(self.directory):
+            if filename.startswith(prefix) and filename.endswith('.json') and \
+                    os.path.join(self.directory, filename) != path:
+                _remove_quietly(os.path.join(self.directory, filename))
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,37 @@
+# microblog_app/http_cache.py
+from functools import wraps
+from flask import current_app, make_response, request, session
+from werkzeug.http import is_resource_modified
+from models import db
+from write_version import current_write_version
+
+DEFAULT_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+def conditional_view(view):
+    """
+    Serve a read-only view with ETag/Last-Modified validators from write_version.
+    A matching If-None-Match / If-Modified-Since gets a bare 304 before the
+    view runs. Pages with pending flash messages are always rendered fresh,
+    since the messages are part of the body.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if '_flashes' in session:
+            return view(*args, **kwargs)
+        
+        version = current_write_version(db.session)
+        etag = f'{request.endpoint}:{version.token}'
+        cache_control = current_app.config['HTTP_CACHE_CONTROL']
+        
+        if not is_resource_modified(request.environ, etag=etag, last_modified=version.last_modified):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        
+        response.set_etag(etag)
+        response.last_modified = version.last_modified
+        response.headers['Cache-Control'] = cache_control
+        return response
+    return wrapper
@@ -0,0 +1,180 @@
+# microblog_app/instrumentation.py
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+DEFAULT_SLOW_QUERY_MS = 100
+SLOW_QUERY_LOG_SIZE = 50
+
+class QueryCounter:
+    """Records every SQL statement sent to the database while attached to an engine"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+@contextmanager
+def count_queries(engine):
+    """
+    Count the statements executed inside the block, e.g. to check that a page
+    issues the same number of queries however many posts it renders:
+
+        with count_queries(db.engine) as queries:
+            client.get('/dashboard?per_page=100')
+        assert queries.count == expected
+    """
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter._before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter._before_cursor_execute)
+
+class _EndpointStats:
+    """Running totals for one endpoint"""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.render_seconds = 0.0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def add(self, queries, db_seconds, render_seconds, total_seconds):
+        self.requests += 1
+        self.queries += queries
+        self.db_seconds += db_seconds
+        self.render_seconds += render_seconds
+        self.total_seconds += total_seconds
+        self.max_seconds = max(self.max_seconds, total_seconds)
+
+    def summary(self, endpoint):
+        n = self.requests
+        return {
+            'endpoint': endpoint,
+            'requests': n,
+            'avg_queries': round(self.queries / n, 1),
+            'avg_db_ms': round(self.db_seconds / n * 1000, 2),
+            'avg_render_ms': round(self.render_seconds / n * 1000, 2),
+            'avg_total_ms': round(self.total_seconds / n * 1000, 2),
+            'max_total_ms': round(self.max_seconds * 1000, 2),
+            'total_db_ms': round(self.db_seconds * 1000, 1),
+        }
+
+class RequestProfiler:
+    """
+    Opt-in per-request profiling (enabled by the SQL_PROFILING config flag).
+    Cursor events time every statement; request hooks and template signals
+    attribute query count, DB time and render time to the Flask endpoint.
+    Statements slower than slow_query_ms are logged with their query plan
+    and kept in a short in-memory log for /admin/perf. Streamed responses
+    are timed until the view returns, not until the body is sent.
+    """
+
+    def __init__(self, slow_query_ms=DEFAULT_SLOW_QUERY_MS, log_size=SLOW_QUERY_LOG_SIZE):
+        self.slow_query_ms = slow_query_ms
+        self.logger = None
+        self._lock = threading.Lock()
+        self._log_size = log_size
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+            self.slow_queries = deque(maxlen=self._log_size)
+            self.started_at = datetime.now()
+
+    def init_app(self, app, engine):
+        """Attach to the engine and app; call inside an app context"""
+        self.logger = app.logger
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._before_render, app, weak=False)
+        template_rendered.connect(self._after_render, app, weak=False)
+
+    def endpoint_summaries(self):
+        """Per-endpoint averages, slowest total DB time first"""
+        with self._lock:
+            rows = [stats.summary(endpoint) for endpoint, stats in self._endpoints.items()]
+        return sorted(rows, key=lambda row: row['total_db_ms'], reverse=True)
+
+    # --- request hooks ---
+
+    def _before_request(self):
+        g.perf = {'started': time.perf_counter(), 'queries': 0, 'db_seconds': 0.0,
+                  'render_seconds': 0.0, 'render_started': None}
+
+    def _teardown_request(self, exc):
+        perf = g.pop('perf', None)
+        if perf is None:
+            return
+        total = time.perf_counter() - perf['started']
+        endpoint = request.endpoint or request.path
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, _EndpointStats())
+            stats.add(perf['queries'], perf['db_seconds'], perf['render_seconds'], total)
+
+    def _before_render(self, sender, template, context, **extra):
+        perf = g.get('perf')
+        if perf is not None:
+            perf['render_started'] = time.perf_counter()
+
+    def _after_render(self, sender, template, context, **extra):
+        perf = g.get('perf')
+        if perf is not None and perf['render_started'] is not None:
+            perf['render_seconds'] += time.perf_counter() - perf['render_started']
+            perf['render_started'] = None
+
+    # --- cursor events ---
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('perf_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['perf_query_start'].pop()
+        endpoint = None
+        if has_request_context():
+            endpoint = request.endpoint
+            perf = g.get('perf')
+            if perf is not None:
+                perf['queries'] += 1
+                perf['db_seconds'] += elapsed
+
+        if elapsed * 1000 >= self.slow_query_ms:
+            plan = None if executemany else _explain(cursor, statement, parameters)
+            self.slow_queries.appendleft({
+                'at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'endpoint': endpoint or '-',
+                'ms': round(elapsed * 1000, 2),
+                'statement': statement.strip(),
+                'plan': plan,
+            })
+            if self.logger:
+                self.logger.warning("Slow query (%.1f ms) in %s: %s\n%s", elapsed * 1000,
+                                    endpoint or '-', statement.strip(), plan or '(no plan)')
+
+def _explain(cursor, statement, parameters):
+    """EXPLAIN QUERY PLAN for a statement on the same SQLite connection, as indented text"""
+    try:
+        rows = cursor.connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    except Exception:
+        return None
+    depth = {0: 0}
+    lines = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, 0) + 1
+        lines.append('  ' * (depth[node_id] - 1) + detail)
+    return '\n'.join(lines)
@@ -0,0 +1,195 @@
+# microblog_app/metrics.py
+import threading
+import time
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+# Prometheus text exposition format, written by hand so the app needs no
+# client library or push gateway; a local collector scrapes /metrics.
+# Values are per process: with several gunicorn workers, scrape each one or
+# sum them in the collector.
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 500, 1000, 10000, 100000)
+GROUP_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# sqlite3 reports lock contention (after busy_timeout runs out) with these messages
+SQLITE_LOCK_MESSAGES = ('database is locked', 'database table is locked', 'database is busy')
+
+def _label_text(names, values):
+    if not names:
+        return ''
+    pairs = (f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + ','.join(pairs) + '}'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help_text, self.labels = name, help_text, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_label_text(self.labels, label_values)} {_format_value(value)}')
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help_text, self.labels = name, help_text, tuple(labels)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        names = self.labels + ('le',)
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _format_value(bound)
+                    lines.append(f'{self.name}_bucket{_label_text(names, label_values + (le,))} {cumulative}')
+                labels = _label_text(self.labels, label_values)
+                lines.append(f'{self.name}_sum{labels} {_format_value(series[-2])}')
+                lines.append(f'{self.name}_count{labels} {series[-1]}')
+        return lines
+
+def _gauge_lines(name, help_text, samples, labels=()):
+    """Render a gauge from (label_values, value) pairs computed at scrape time"""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+    for label_values, value in samples:
+        lines.append(f'{name}{_label_text(labels, label_values)} {_format_value(value)}')
+    return lines
+
+class Metrics:
+    """
+    Per-process request, database and cache metrics.
+    Request latency and status counts come from Flask request hooks; rows
+    returned are reported by views via observe_rows(); pool usage and cache
+    hit/miss totals are read when /metrics is scraped.
+    """
+
+    def __init__(self):
+        self.request_latency = Histogram(
+            'microblog_request_duration_seconds', 'Request latency by endpoint.',
+            labels=('endpoint', 'method'))
+        self.requests = Counter(
+            'microblog_requests_total', 'Requests by endpoint and status code.',
+            labels=('endpoint', 'method', 'status'))
+        self.response_rows = Histogram(
+            'microblog_response_rows', 'Rows returned per request by listing and export endpoints.',
+            labels=('endpoint',), buckets=ROW_BUCKETS)
+        self.sqlite_lock_errors = Counter(
+            'microblog_sqlite_lock_errors_total',
+            'Statements that failed with SQLITE_BUSY/SQLITE_LOCKED after busy_timeout expired.',
+            labels=('statement',))
+        self.write_group_size = Histogram(
+            'microblog_write_group_size', 'Posts committed per group by the write queue.',
+            buckets=GROUP_BUCKETS)
+        self.write_group_latency = Histogram(
+            'microblog_write_group_duration_seconds', 'Time to insert and commit one write queue group.')
+        self.engine = None
+        self.caches = {}  # name -> object with hits and misses attributes
+
+    def init_app(self, app, engine):
+        """Attach request hooks and engine listeners; call inside an app context"""
+        self.engine = engine
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        event.listen(engine, 'handle_error', self._handle_error)
+
+    def register_cache(self, name, cache):
+        self.caches[name] = cache
+
+    def observe_rows(self, count):
+        """Record how many rows the current request returned"""
+        if has_request_context():
+            self.response_rows.observe(count, request.endpoint or request.path)
+
+    def observe_write_group(self, count, seconds):
+        """PostWriteQueue on_batch hook"""
+        self.write_group_size.observe(count)
+        self.write_group_latency.observe(seconds)
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            endpoint = request.endpoint or 'unmatched'
+            self.request_latency.observe(time.perf_counter() - started, endpoint, request.method)
+            self.requests.inc(endpoint, request.method, str(response.status_code))
+        return response
+
+    def _handle_error(self, context):
+        message = str(context.original_exception).lower()
+        if any(text in message for text in SQLITE_LOCK_MESSAGES):
+            verb = (context.statement or '').lstrip().split(' ', 1)[0].upper() or 'UNKNOWN'
+            self.sqlite_lock_errors.inc(verb)
+
+    def _pool_lines(self):
+        pool = self.engine.pool if self.engine is not None else None
+        samples = []
+        for stat in ('size', 'checkedin', 'checkedout', 'overflow'):
+            method = getattr(pool, stat, None)
+            if callable(method):
+                samples.append(((stat,), method()))
+        return _gauge_lines('microblog_db_pool_connections',
+                            'SQLAlchemy pool counters (overflow is negative while below pool size).',
+                            samples, labels=('state',))
+
+    def _cache_lines(self):
+        requests, ratios = [], []
+        for name, cache in sorted(self.caches.items()):
+            hits, misses = cache.hits, cache.misses
+            requests.extend([((name, 'hit'), hits), ((name, 'miss'), misses)])
+            ratios.append(((name,), hits / (hits + misses) if hits + misses else 0.0))
+        lines = ['# HELP microblog_cache_requests_total Cache lookups by result.',
+                 '# TYPE microblog_cache_requests_total counter']
+        lines += [f'microblog_cache_requests_total{_label_text(("cache", "result"), labels)} {value}'
+                  for labels, value in requests]
+        lines += _gauge_lines('microblog_cache_hit_ratio', 'Cache hits / lookups since start.',
+                              ratios, labels=('cache',))
+        return lines
+
+    def render(self):
+        lines = []
+        for metric in (self.request_latency, self.requests, self.response_rows, self.sqlite_lock_errors,
+                       self.write_group_size, self.write_group_latency):
+            lines += metric.render()
+        lines += self._pool_lines()
+        lines += self._cache_lines()
+        return '\n'.join(lines) + '\n'
+
+def record_rows(count):
+    """Report how many rows this request returned to the app's row histogram"""
+    current_app.extensions['metrics'].observe_rows(count)
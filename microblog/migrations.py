@@ -0,0 +1,401 @@
+# microblog_app/migrations.py
+from models import db
+from sqlalchemy import text
+
+# Ordered schema changes for databases created before the current models.
+# Each entry is (version, [statements]); the applied version is tracked in
+# SQLite's PRAGMA user_version so every step runs exactly once.
+# Steps are frozen literal SQL: never edit an applied step, since databases
+# already past it would never see the change. Add a new numbered step instead.
+MIGRATIONS = [
+    (1, [
+        "CREATE INDEX IF NOT EXISTS ix_post_user_id_date_posted ON post (user_id, date_posted)",
+        "CREATE INDEX IF NOT EXISTS ix_post_date_posted_id ON post (date_posted, id)",
+    ]),
+    # Per-user counters maintained by triggers so stats views are O(users), not O(posts)
+    (2, [
+        """CREATE TABLE IF NOT EXISTS user_stats (
+               user_id INTEGER PRIMARY KEY REFERENCES user (id),
+               post_count INTEGER NOT NULL DEFAULT 0,
+               first_post_date DATETIME,
+               last_post_date DATETIME,
+               total_content_length INTEGER NOT NULL DEFAULT 0
+           )""",
+        
+        """CREATE TRIGGER IF NOT EXISTS trg_user_stats_user_insert AFTER INSERT ON user
+           BEGIN
+               INSERT OR IGNORE INTO user_stats (user_id) VALUES (NEW.id);
+           END""",
+        
+        """CREATE TRIGGER IF NOT EXISTS trg_user_stats_user_delete AFTER DELETE ON user
+           BEGIN
+               DELETE FROM user_stats WHERE user_id = OLD.id;
+           END""",
+        
+        """CREATE TRIGGER IF NOT EXISTS trg_user_stats_post_insert AFTER INSERT ON post
+           BEGIN
+               INSERT OR IGNORE INTO user_stats (user_id) VALUES (NEW.user_id);
+               UPDATE user_stats SET
+                   post_count = post_count + 1,
+                   total_content_length = total_content_length + LENGTH(NEW.content),
+                   first_post_date = CASE WHEN first_post_date IS NULL OR NEW.date_posted < first_post_date
+                                          THEN NEW.date_posted ELSE first_post_date END,
+                   last_post_date = CASE WHEN last_post_date IS NULL OR NEW.date_posted > last_post_date
+                                         THEN NEW.date_posted ELSE last_post_date END
+               WHERE user_id = NEW.user_id;
+           END""",
+        
+        # First/last dates are re-read through ix_post_user_id_date_posted, an index seek per row
+        """CREATE TRIGGER IF NOT EXISTS trg_user_stats_post_delete AFTER DELETE ON post
+           BEGIN
+               UPDATE user_stats SET
+                   post_count = post_count - 1,
+                   total_content_length = total_content_length - LENGTH(OLD.content),
+                   first_post_date = (SELECT MIN(date_posted) FROM post WHERE user_id = OLD.user_id),
+                   last_post_date = (SELECT MAX(date_posted) FROM post WHERE user_id = OLD.user_id)
+               WHERE user_id = OLD.user_id;
+           END""",
+        
+        """CREATE TRIGGER IF NOT EXISTS trg_user_stats_post_update
+           AFTER UPDATE OF content, date_posted, user_id ON post
+           BEGIN
+               UPDATE user_stats SET
+                   post_count = post_count - 1,
+                   total_content_length = total_content_length - LENGTH(OLD.content)
+               WHERE user_id = OLD.user_id;
+               INSERT OR IGNORE INTO user_stats (user_id) VALUES (NEW.user_id);
+               UPDATE user_stats SET
+                   post_count = post_count + 1,
+                   total_content_length = total_content_length + LENGTH(NEW.content)
+               WHERE user_id = NEW.user_id;
+               UPDATE user_stats SET
+                   first_post_date = (SELECT MIN(date_posted) FROM post WHERE user_id = user_stats.user_id),
+                   last_post_date = (SELECT MAX(date_posted) FROM post WHERE user_id = user_stats.user_id)
+               WHERE user_id IN (OLD.user_id, NEW.user_id);
+           END""",
+        
+        # Backfill counters for rows written before the triggers existed
+        """INSERT OR REPLACE INTO user_stats
+               (user_id, post_count, first_post_date, last_post_date, total_content_length)
+           SELECT u.id, COUNT(p.id), MIN(p.date_posted), MAX(p.date_posted),
+                  COALESCE(SUM(LENGTH(p.content)), 0)
+           FROM user u LEFT JOIN post p ON u.id = p.user_id
+           GROUP BY u.id""",
+    ]),
+    # Full-text index over post title/content; post stays the single source of truth
+    (3, [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5(
+               title, content, content='post', content_rowid='id'
+           )""",
+        
+        """CREATE TRIGGER IF NOT EXISTS trg_post_fts_insert AFTER INSERT ON post
+           BEGIN
+               INSERT INTO post_fts (rowid, title, content) VALUES (NEW.id, NEW.title, NEW.content);
+           END""",
+        
+        """CREATE TRIGGER IF NOT EXISTS trg_post_fts_delete AFTER DELETE ON post
+           BEGIN
+               INSERT INTO post_fts (post_fts, rowid, title, content)
+               VALUES ('delete', OLD.id, OLD.title, OLD.content);
+           END""",
+        
+        """CREATE TRIGGER IF NOT EXISTS trg_post_fts_update AFTER UPDATE OF title, content ON post
+           BEGIN
+               INSERT INTO post_fts (post_fts, rowid, title, content)
+               VALUES ('delete', OLD.id, OLD.title, OLD.content);
+               INSERT INTO post_fts (rowid, title, content) VALUES (NEW.id, NEW.title, NEW.content);
+           END""",
+        
+        "INSERT INTO post_fts (post_fts) VALUES ('rebuild')",
+    ]),
+    # Key/value store for schema bookkeeping such as the view DDL fingerprint
+    (4, [
+        """CREATE TABLE IF NOT EXISTS schema_meta (
+               key TEXT PRIMARY KEY,
+               value TEXT NOT NULL
+           )""",
+    ]),
+    # Lets 'ORDER BY post_count DESC' over v_user_stats stream rows instead of sorting
+    (5, [
+        "CREATE INDEX IF NOT EXISTS ix_user_stats_post_count ON user_stats (post_count)",
+    ]),
+    # Hourly/daily activity rollups maintained by triggers (see rollups.py), then a backfill
+    (6, [
+        """CREATE TABLE IF NOT EXISTS post_rollup_hourly (
+               bucket TEXT PRIMARY KEY,
+               posts INTEGER NOT NULL DEFAULT 0,
+               total_content_length INTEGER NOT NULL DEFAULT 0,
+               distinct_authors INTEGER NOT NULL DEFAULT 0
+           ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS post_rollup_hourly_authors (
+               bucket TEXT NOT NULL,
+               user_id INTEGER NOT NULL,
+               posts INTEGER NOT NULL,
+               PRIMARY KEY (bucket, user_id)
+           ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS post_rollup_daily (
+               bucket TEXT PRIMARY KEY,
+               posts INTEGER NOT NULL DEFAULT 0,
+               total_content_length INTEGER NOT NULL DEFAULT 0,
+               distinct_authors INTEGER NOT NULL DEFAULT 0
+           ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS post_rollup_daily_authors (
+               bucket TEXT NOT NULL,
+               user_id INTEGER NOT NULL,
+               posts INTEGER NOT NULL,
+               PRIMARY KEY (bucket, user_id)
+           ) WITHOUT ROWID""",
+        """CREATE TRIGGER IF NOT EXISTS trg_post_rollup_insert AFTER INSERT ON post
+           BEGIN
+               INSERT OR IGNORE INTO post_rollup_hourly (bucket) VALUES (strftime('%Y-%m-%d %H', NEW.date_posted));
+               UPDATE post_rollup_hourly SET
+                   posts = posts + 1,
+                   total_content_length = total_content_length + LENGTH(NEW.content),
+                   distinct_authors = distinct_authors + NOT EXISTS (
+                       SELECT 1 FROM post_rollup_hourly_authors
+                       WHERE bucket = strftime('%Y-%m-%d %H', NEW.date_posted) AND user_id = NEW.user_id)
+               WHERE bucket = strftime('%Y-%m-%d %H', NEW.date_posted);
+               INSERT INTO post_rollup_hourly_authors (bucket, user_id, posts)
+               VALUES (strftime('%Y-%m-%d %H', NEW.date_posted), NEW.user_id, 1)
+               ON CONFLICT (bucket, user_id) DO UPDATE SET posts = posts + 1;
+               INSERT OR IGNORE INTO post_rollup_daily (bucket) VALUES (date(NEW.date_posted));
+               UPDATE post_rollup_daily SET
+                   posts = posts + 1,
+                   total_content_length = total_content_length + LENGTH(NEW.content),
+                   distinct_authors = distinct_authors + NOT EXISTS (
+                       SELECT 1 FROM post_rollup_daily_authors
+                       WHERE bucket = date(NEW.date_posted) AND user_id = NEW.user_id)
+               WHERE bucket = date(NEW.date_posted);
+               INSERT INTO post_rollup_daily_authors (bucket, user_id, posts)
+               VALUES (date(NEW.date_posted), NEW.user_id, 1)
+               ON CONFLICT (bucket, user_id) DO UPDATE SET posts = posts + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_post_rollup_delete AFTER DELETE ON post
+           BEGIN
+               UPDATE post_rollup_hourly SET
+                   posts = posts - 1,
+                   total_content_length = total_content_length - LENGTH(OLD.content),
+                   distinct_authors = distinct_authors - COALESCE((
+                       SELECT posts = 1 FROM post_rollup_hourly_authors
+                       WHERE bucket = strftime('%Y-%m-%d %H', OLD.date_posted) AND user_id = OLD.user_id), 0)
+               WHERE bucket = strftime('%Y-%m-%d %H', OLD.date_posted);
+               DELETE FROM post_rollup_hourly_authors
+               WHERE bucket = strftime('%Y-%m-%d %H', OLD.date_posted) AND user_id = OLD.user_id AND posts <= 1;
+               UPDATE post_rollup_hourly_authors SET posts = posts - 1
+               WHERE bucket = strftime('%Y-%m-%d %H', OLD.date_posted) AND user_id = OLD.user_id;
+               DELETE FROM post_rollup_hourly WHERE bucket = strftime('%Y-%m-%d %H', OLD.date_posted) AND posts <= 0;
+               UPDATE post_rollup_daily SET
+                   posts = posts - 1,
+                   total_content_length = total_content_length - LENGTH(OLD.content),
+                   distinct_authors = distinct_authors - COALESCE((
+                       SELECT posts = 1 FROM post_rollup_daily_authors
+                       WHERE bucket = date(OLD.date_posted) AND user_id = OLD.user_id), 0)
+               WHERE bucket = date(OLD.date_posted);
+               DELETE FROM post_rollup_daily_authors
+               WHERE bucket = date(OLD.date_posted) AND user_id = OLD.user_id AND posts <= 1;
+               UPDATE post_rollup_daily_authors SET posts = posts - 1
+               WHERE bucket = date(OLD.date_posted) AND user_id = OLD.user_id;
+               DELETE FROM post_rollup_daily WHERE bucket = date(OLD.date_posted) AND posts <= 0;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_post_rollup_update
+           AFTER UPDATE OF content, date_posted, user_id ON post
+           BEGIN
+               UPDATE post_rollup_hourly SET
+                   posts = posts - 1,
+                   total_content_length = total_content_length - LENGTH(OLD.content),
+                   distinct_authors = distinct_authors - COALESCE((
+                       SELECT posts = 1 FROM post_rollup_hourly_authors
+                       WHERE bucket = strftime('%Y-%m-%d %H', OLD.date_posted) AND user_id = OLD.user_id), 0)
+               WHERE bucket = strftime('%Y-%m-%d %H', OLD.date_posted);
+               DELETE FROM post_rollup_hourly_authors
+               WHERE bucket = strftime('%Y-%m-%d %H', OLD.date_posted) AND user_id = OLD.user_id AND posts <= 1;
+               UPDATE post_rollup_hourly_authors SET posts = posts - 1
+               WHERE bucket = strftime('%Y-%m-%d %H', OLD.date_posted) AND user_id = OLD.user_id;
+               DELETE FROM post_rollup_hourly WHERE bucket = strftime('%Y-%m-%d %H', OLD.date_posted) AND posts <= 0;
+               INSERT OR IGNORE INTO post_rollup_hourly (bucket) VALUES (strftime('%Y-%m-%d %H', NEW.date_posted));
+               UPDATE post_rollup_hourly SET
+                   posts = posts + 1,
+                   total_content_length = total_content_length + LENGTH(NEW.content),
+                   distinct_authors = distinct_authors + NOT EXISTS (
+                       SELECT 1 FROM post_rollup_hourly_authors
+                       WHERE bucket = strftime('%Y-%m-%d %H', NEW.date_posted) AND user_id = NEW.user_id)
+               WHERE bucket = strftime('%Y-%m-%d %H', NEW.date_posted);
+               INSERT INTO post_rollup_hourly_authors (bucket, user_id, posts)
+               VALUES (strftime('%Y-%m-%d %H', NEW.date_posted), NEW.user_id, 1)
+               ON CONFLICT (bucket, user_id) DO UPDATE SET posts = posts + 1;
+               UPDATE post_rollup_daily SET
+                   posts = posts - 1,
+                   total_content_length = total_content_length - LENGTH(OLD.content),
+                   distinct_authors = distinct_authors - COALESCE((
+                       SELECT posts = 1 FROM post_rollup_daily_authors
+                       WHERE bucket = date(OLD.date_posted) AND user_id = OLD.user_id), 0)
+               WHERE bucket = date(OLD.date_posted);
+               DELETE FROM post_rollup_daily_authors
+               WHERE bucket = date(OLD.date_posted) AND user_id = OLD.user_id AND posts <= 1;
+               UPDATE post_rollup_daily_authors SET posts = posts - 1
+               WHERE bucket = date(OLD.date_posted) AND user_id = OLD.user_id;
+               DELETE FROM post_rollup_daily WHERE bucket = date(OLD.date_posted) AND posts <= 0;
+               INSERT OR IGNORE INTO post_rollup_daily (bucket) VALUES (date(NEW.date_posted));
+               UPDATE post_rollup_daily SET
+                   posts = posts + 1,
+                   total_content_length = total_content_length + LENGTH(NEW.content),
+                   distinct_authors = distinct_authors + NOT EXISTS (
+                       SELECT 1 FROM post_rollup_daily_authors
+                       WHERE bucket = date(NEW.date_posted) AND user_id = NEW.user_id)
+               WHERE bucket = date(NEW.date_posted);
+               INSERT INTO post_rollup_daily_authors (bucket, user_id, posts)
+               VALUES (date(NEW.date_posted), NEW.user_id, 1)
+               ON CONFLICT (bucket, user_id) DO UPDATE SET posts = posts + 1;
+           END""",
+        "DELETE FROM post_rollup_hourly_authors",
+        "DELETE FROM post_rollup_hourly",
+        "DELETE FROM post_rollup_daily_authors",
+        "DELETE FROM post_rollup_daily",
+        """INSERT INTO post_rollup_hourly_authors (bucket, user_id, posts)
+               SELECT strftime('%Y-%m-%d %H', post.date_posted), user_id, COUNT(*) FROM post GROUP BY 1, 2""",
+        """INSERT INTO post_rollup_hourly (bucket, posts, total_content_length, distinct_authors)
+               SELECT strftime('%Y-%m-%d %H', post.date_posted), COUNT(*), SUM(LENGTH(content)), COUNT(DISTINCT user_id)
+               FROM post GROUP BY 1""",
+        """INSERT INTO post_rollup_daily_authors (bucket, user_id, posts)
+               SELECT date(post.date_posted), user_id, COUNT(*) FROM post GROUP BY 1, 2""",
+        """INSERT INTO post_rollup_daily (bucket, posts, total_content_length, distinct_authors)
+               SELECT date(post.date_posted), COUNT(*), SUM(LENGTH(content)), COUNT(DISTINCT user_id)
+               FROM post GROUP BY 1""",
+    ]),
+    # Per-table change counters for cache validation (see write_version.py)
+    (7, [
+        """CREATE TABLE IF NOT EXISTS write_version (
+               name TEXT PRIMARY KEY,
+               version INTEGER NOT NULL DEFAULT 0,
+               updated_at TEXT NOT NULL
+           ) WITHOUT ROWID""",
+        """INSERT OR IGNORE INTO write_version (name, version, updated_at)
+           VALUES ('user', 0, strftime('%Y-%m-%d %H:%M:%S', 'now'))""",
+        """CREATE TRIGGER IF NOT EXISTS trg_write_version_user_insert
+           AFTER INSERT ON user
+           BEGIN
+               UPDATE write_version SET version = version + 1,
+                   updated_at = strftime('%Y-%m-%d %H:%M:%S', 'now')
+               WHERE name = 'user';
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_write_version_user_update
+           AFTER UPDATE ON user
+           BEGIN
+               UPDATE write_version SET version = version + 1,
+                   updated_at = strftime('%Y-%m-%d %H:%M:%S', 'now')
+               WHERE name = 'user';
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_write_version_user_delete
+           AFTER DELETE ON user
+           BEGIN
+               UPDATE write_version SET version = version + 1,
+                   updated_at = strftime('%Y-%m-%d %H:%M:%S', 'now')
+               WHERE name = 'user';
+           END""",
+        """INSERT OR IGNORE INTO write_version (name, version, updated_at)
+           VALUES ('post', 0, strftime('%Y-%m-%d %H:%M:%S', 'now'))""",
+        """CREATE TRIGGER IF NOT EXISTS trg_write_version_post_insert
+           AFTER INSERT ON post
+           BEGIN
+               UPDATE write_version SET version = version + 1,
+                   updated_at = strftime('%Y-%m-%d %H:%M:%S', 'now')
+               WHERE name = 'post';
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_write_version_post_update
+           AFTER UPDATE ON post
+           BEGIN
+               UPDATE write_version SET version = version + 1,
+                   updated_at = strftime('%Y-%m-%d %H:%M:%S', 'now')
+               WHERE name = 'post';
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_write_version_post_delete
+           AFTER DELETE ON post
+           BEGIN
+               UPDATE write_version SET version = version + 1,
+                   updated_at = strftime('%Y-%m-%d %H:%M:%S', 'now')
+               WHERE name = 'post';
+           END""",
+    ]),
+    # Case-insensitive prefix lookups for the user typeahead (search.suggest_users)
+    (8, [
+        "CREATE INDEX IF NOT EXISTS ix_user_username_nocase ON user (username COLLATE NOCASE)",
+    ]),
+    # Post generation: moves only when posts are deleted, so caches keyed on post ids
+    # (which restart after a wipe) know to rebuild (see write_version.py)
+    (9, [
+        """INSERT OR IGNORE INTO write_version (name, version, updated_at)
+           VALUES ('post_generation', 0, strftime('%Y-%m-%d %H:%M:%S', 'now'))""",
+        """CREATE TRIGGER IF NOT EXISTS trg_write_version_post_generation
+           AFTER DELETE ON post
+           BEGIN
+               UPDATE write_version SET version = version + 1,
+                   updated_at = strftime('%Y-%m-%d %H:%M:%S', 'now')
+               WHERE name = 'post_generation';
+           END""",
+    ]),
+    # Random identity for this database file, so caches shared between databases
+    # (e.g. a fragment cache directory) never mistake one for another
+    (10, [
+        """INSERT OR IGNORE INTO schema_meta (key, value)
+           VALUES ('database_id', lower(hex(randomblob(8))))""",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version():
+    """Return the schema version recorded in the database"""
+    return db.session.execute(text("PRAGMA user_version")).scalar() or 0
+
+def begin_schema_lock():
+    """
+    Take SQLite's write lock before changing the schema.
+    Workers booting together queue on busy_timeout instead of racing.
+    """
+    db.session.execute(text("BEGIN IMMEDIATE"))
+
+def get_schema_meta(key):
+    """Return a schema_meta value, or None if unset"""
+    return db.session.execute(text("SELECT value FROM schema_meta WHERE key = :key"),
+                              {'key': key}).scalar()
+
+def set_schema_meta(key, value):
+    """Insert or replace a schema_meta value (caller commits)"""
+    db.session.execute(text("INSERT OR REPLACE INTO schema_meta (key, value) VALUES (:key, :value)"),
+                       {'key': key, 'value': value})
+
+def create_tables(app):
+    """Create any missing model tables while holding the schema lock"""
+    with app.app_context():
+        try:
+            begin_schema_lock()
+            db.metadata.create_all(bind=db.session.connection())
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+def apply_migrations(app):
+    """Bring an existing database up to the latest schema version"""
+    with app.app_context():
+        # Fast path: nothing to do, so don't take the write lock at all
+        if get_schema_version() >= LATEST_VERSION:
+            return
+        
+        for version, statements in MIGRATIONS:
+            try:
+                begin_schema_lock()
+                # Another worker may have applied this step while we waited for the lock
+                if get_schema_version() >= version:
+                    db.session.commit()
+                    continue
+                for stmt in statements:
+                    db.session.execute(text(stmt))
+                # PRAGMA does not accept bound parameters; version is always an int
+                db.session.execute(text(f"PRAGMA user_version = {int(version)}"))
+                db.session.commit()
+                print(f"Applied schema migration {version}.")
+            except Exception as e:
+                db.session.rollback()
+                print(f"Warning: Could not apply schema migration {version}: {e}")
+                break
@@ -22,5 +22,11 @@ class Post(db.Model):
     date_posted = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    # Keep in sync with migrations.MIGRATIONS so existing databases get them too
+    __table_args__ = (
+        db.Index('ix_post_user_id_date_posted', 'user_id', 'date_posted'),
+        db.Index('ix_post_date_posted_id', 'date_posted', 'id'),
+    )
+
     def __repr__(self):
         return f"Post('{self.title}', '{self.date_posted}')"
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""
+pagination.py
+-------------
+Keyset (cursor) pagination helpers for post listings.
+
+Pages are addressed by the (date_posted, id) of the last row shown instead of
+an OFFSET, so fetching any page costs the same no matter how deep it is.
+"""
+
+from __future__ import annotations
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Tuple
+from sqlalchemy import text, tuple_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Same layout SQLAlchemy uses to store DateTime columns in SQLite, so a cursor
+# compares correctly against both ORM columns and raw view rows.
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    older_cursor: Optional[str]
+    newer_cursor: Optional[str]
+
+
+def encode_cursor(date_posted: datetime | str, row_id: int) -> str:
+    """Build an opaque cursor from a row's sort key."""
+    if isinstance(date_posted, datetime):
+        date_posted = date_posted.strftime(SQLITE_DATETIME_FORMAT)
+    return f"{date_posted}_{row_id}"
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Return (date_posted, id) from a cursor, or None if missing/invalid."""
+    if not cursor:
+        return None
+    date_part, _, id_part = cursor.rpartition("_")
+    try:
+        datetime.strptime(date_part, SQLITE_DATETIME_FORMAT)
+        return date_part, int(id_part)
+    except ValueError:
+        return None
+
+
+def clamp_page_size(per_page: Optional[int]) -> int:
+    """Keep a user-supplied page size within sane bounds."""
+    if not per_page or per_page < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(per_page, MAX_PAGE_SIZE)
+
+
+def _build_page(rows: List[Any], per_page: int, before: Optional[Tuple], after: Optional[Tuple]) -> Page:
+    """Trim the look-ahead row and work out which neighbouring cursors exist."""
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if after:
+        # Newer pages are fetched oldest-first; flip back to newest-first
+        rows.reverse()
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = before is not None, has_more
+
+    if not rows:
+        return Page([], None, None)
+    newest, oldest = rows[0], rows[-1]
+    return Page(
+        rows,
+        encode_cursor(oldest.date_posted, oldest.id) if has_older else None,
+        encode_cursor(newest.date_posted, newest.id) if has_newer else None,
+    )
+
+
+def paginate_posts(query, model, before: Optional[str] = None, after: Optional[str] = None,
+                   per_page: int = DEFAULT_PAGE_SIZE) -> Page:
+    """
+    Keyset-paginate an ORM query over a model with date_posted and id columns.
+    before: cursor of the last row seen; returns older rows.
+    after: cursor of the first row seen; returns newer rows.
+    """
+    per_page = clamp_page_size(per_page)
+    before_key, after_key = decode_cursor(before), decode_cursor(after)
+    sort_key = tuple_(model.date_posted, model.id)
+
+    if after_key:
+        query = query.filter(sort_key > _as_datetime_key(after_key))
+        query = query.order_by(model.date_posted.asc(), model.id.asc())
+    else:
+        if before_key:
+            query = query.filter(sort_key < _as_datetime_key(before_key))
+        query = query.order_by(model.date_posted.desc(), model.id.desc())
+
+    rows = query.limit(per_page + 1).all()
+    return _build_page(rows, per_page, before_key, after_key)
+
+
+def paginate_view(session, view_name: str, columns: str = "*", where: str = "",
+                  params: Optional[dict] = None, before: Optional[str] = None,
+                  after: Optional[str] = None, per_page: int = DEFAULT_PAGE_SIZE) -> Page:
+    """
+    Keyset-paginate a read-only view that exposes date_posted and id columns.
+    where: optional extra SQL condition (use bound parameters via params).
+    """
+    per_page = clamp_page_size(per_page)
+    before_key, after_key = decode_cursor(before), decode_cursor(after)
+    params = dict(params or {})
+    conditions = [where] if where else []
+
+    if after_key:
+        conditions.append("(date_posted, id) > (:cursor_date, :cursor_id)")
+        params["cursor_date"], params["cursor_id"] = after_key
+        order = "date_posted ASC, id ASC"
+    else:
+        if before_key:
+            conditions.append("(date_posted, id) < (:cursor_date, :cursor_id)")
+            params["cursor_date"], params["cursor_id"] = before_key
+        order = "date_posted DESC, id DESC"
+
+    sql = f"SELECT {columns} FROM {view_name}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(f"({c})" for c in conditions)
+    sql += f" ORDER BY {order} LIMIT :page_limit"
+    params["page_limit"] = per_page + 1
+
+    rows = list(session.execute(text(sql), params).fetchall())
+    return _build_page(rows, per_page, before_key, after_key)
+
+
+def paginate_view_by_id(session, view_name: str, columns: str = "*", where: str = "",
+                        params: Optional[dict] = None, after: Optional[str] = None,
+                        per_page: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Any], Optional[str]]:
+    """
+    Keyset-paginate a view in ascending id order, for rows without a date key.
+    after: the next_cursor of the previous page. Returns (rows, next_cursor).
+    """
+    per_page = clamp_page_size(per_page)
+    params = dict(params or {})
+    conditions = [where] if where else []
+    try:
+        after_id = int(after) if after else None
+    except ValueError:
+        after_id = None
+    if after_id is not None:
+        conditions.append("id > :cursor_id")
+        params["cursor_id"] = after_id
+
+    sql = f"SELECT {columns} FROM {view_name}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(f"({c})" for c in conditions)
+    sql += " ORDER BY id LIMIT :page_limit"
+    params["page_limit"] = per_page + 1
+
+    rows = list(session.execute(text(sql), params).fetchall())
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        return rows, str(rows[-1].id)
+    return rows, None
+
+
+def _as_datetime_key(key: Tuple[str, int]) -> Tuple[datetime, int]:
+    return datetime.strptime(key[0], SQLITE_DATETIME_FORMAT), key[1]
@@ -0,0 +1,60 @@
+# microblog_app/rollups.py
+import time
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from models import db
+from sqlalchemy import text
+
+# Time-bucket rollups of post activity. Each grain has a summary table
+# (posts, total content length, distinct authors per bucket) and an authors
+# table recording who posted in each bucket, which keeps distinct_authors
+# exact as posts are added and removed. Bucket keys sort as text, so
+# 'YYYY-MM-DD' bounds work directly against both grains. The tables and the
+# triggers that maintain them are created by migration 6 (migrations.py).
+ROLLUP_GRAINS = {
+    'hourly': "strftime('%Y-%m-%d %H', {row}.date_posted)",
+    'daily': "date({row}.date_posted)",
+}
+
+def _bucket(grain, row):
+    return ROLLUP_GRAINS[grain].format(row=row)
+
+def clear_statements():
+    """Empty every rollup table"""
+    statements = []
+    for grain in ROLLUP_GRAINS:
+        statements.append(f"DELETE FROM post_rollup_{grain}_authors")
+        statements.append(f"DELETE FROM post_rollup_{grain}")
+    return statements
+
+def rebuild_statements():
+    """Recompute every rollup table from the post table"""
+    statements = clear_statements()
+    for grain in ROLLUP_GRAINS:
+        bucket = _bucket(grain, 'post')
+        statements.append(f"""INSERT INTO post_rollup_{grain}_authors (bucket, user_id, posts)
+               SELECT {bucket}, user_id, COUNT(*) FROM post GROUP BY 1, 2""")
+        statements.append(f"""INSERT INTO post_rollup_{grain} (bucket, posts, total_content_length, distinct_authors)
+               SELECT {bucket}, COUNT(*), SUM(LENGTH(content)), COUNT(DISTINCT user_id)
+               FROM post GROUP BY 1""")
+    return statements
+
+def rebuild_rollups():
+    """Back-fill the rollup tables from post in one transaction"""
+    try:
+        for stmt in rebuild_statements():
+            db.session.execute(text(stmt))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    """Recompute the hourly and daily post rollups from the post table."""
+    started = time.perf_counter()
+    rebuild_rollups()
+    current_app.extensions['analytics_cache'].invalidate()
+    click.echo(f"Rollups rebuilt in {time.perf_counter() - started:.2f}s.")
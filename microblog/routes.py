@@ -1,17 +1,55 @@
 # microblog_app/routes.py
-from flask import Blueprint, render_template, url_for, flash, redirect, request, make_response
+from flask import Blueprint, Response, render_template, url_for, flash, redirect, request, current_app, jsonify
 from models import db, User, Post
 from forms import RegistrationForm, PostForm
+from pagination import paginate_posts, paginate_view, clamp_page_size, DEFAULT_PAGE_SIZE
+from search import search_posts as run_search, recent_posts, suggest_users, SEARCH_TYPES, RESULTS_PER_PAGE, SUGGEST_LIMIT
+from streaming import csv_response, wants_gzip
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, record_rows
+from http_cache import conditional_view
+from write_version import current_write_version
+from seeding import bulk_seed, parse_date, DEFAULT_BATCH_SIZE
+from analytics import build_activity_report
 from sqlalchemy import text
+from sqlalchemy.orm import joinedload
+from markupsafe import Markup
 from faker import Faker
-import csv
-import io
-import pandas as pd
 import json
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 main = Blueprint('main', __name__)
 
+# Rows fetched per round trip when streaming exports
+EXPORT_BATCH_SIZE = 1000
+
+def analytics_cache():
+    """The app's AnalyticsCache; write routes invalidate or reset it"""
+    return current_app.extensions['analytics_cache']
+
+def fragment_cache():
+    """The app's FragmentCache for write_version-keyed dashboard widgets"""
+    return current_app.extensions['fragment_cache']
+
+def get_admin_stats():
+    """Site totals read from the trigger-maintained user_stats counters"""
+    total_posts = db.session.execute(text("SELECT COALESCE(SUM(post_count), 0) FROM user_stats")).scalar()
+    return {
+        'total_users': User.query.count(),
+        'total_posts': total_posts
+    }
+
+def render_recent_posts(before, after, per_page):
+    """One keyset page of posts as the dashboard's post list fragment (plain, JSON-safe values)"""
+    # Authors are joined in so rendering post.author never issues a query per post
+    page = paginate_posts(Post.query.options(joinedload(Post.author)), Post,
+                          before=before, after=after, per_page=per_page)
+    return {
+        'html': render_template('_recent_posts.html', posts=page.items),
+        'count': len(page.items),
+        'newer_cursor': page.newer_cursor,
+        'older_cursor': page.older_cursor,
+    }
+
 # --- MAIN DASHBOARD (Mixed - uses direct queries for user selection) ---
 
 @main.route("/")
@@ -25,8 +63,10 @@ def dashboard():
     else:
         user = User.query.first()
     
-    # Get all users for the dropdown
-    all_users = User.query.all()
+    # Site-wide totals change only on writes, so they're cached per write_version.
+    # The user switcher fetches names from /api/users/suggest as you type.
+    version = current_write_version(db.session).token
+    admin_stats = fragment_cache().get_or_render('admin_stats', version, get_admin_stats)
     
     # If no user exists, show the dashboard anyway with a message to register
     if not user:
@@ -39,35 +79,29 @@ def dashboard():
             id = 0
         
         user = MockUser()
-        recent_posts = []
         user_posts_count = 0
-        admin_stats = {
-            'total_users': User.query.count(),
-            'total_posts': Post.query.count()
-        }
         flash('Welcome! Please register to start using the microblog.', 'info')
     else:
-        # Get recent posts (limit to 5 for dashboard) - using direct query for user interaction
-        recent_posts = Post.query.order_by(Post.date_posted.desc()).limit(5).all()
-        
-        # Count user's posts
-        user_posts_count = Post.query.filter_by(user_id=user.id).count()
-        
-        # Admin stats (you can expand this later)
-        admin_stats = {
-            'total_users': User.query.count(),
-            'total_posts': Post.query.count()
-        }
+        # Count user's posts from the trigger-maintained counters
+        user_posts_count = db.session.execute(text("SELECT post_count FROM user_stats WHERE user_id = :id"),
+                                              {'id': user.id}).scalar() or 0
     
-    # Get all posts for display - using direct query for interactive dashboard
-    posts = Post.query.order_by(Post.date_posted.desc()).all()
+    # The first page of recent posts is the same for every visitor until the next
+    # write, so its rendered HTML is cached per write_version; deeper pages are rendered live.
+    before, after = request.args.get('before'), request.args.get('after')
+    # Clamped before it becomes part of a cache key: one entry per real page size
+    per_page = clamp_page_size(request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int))
+    if before or after:
+        recent = render_recent_posts(before, after, per_page)
+    else:
+        recent = fragment_cache().get_or_render(f'recent_posts_{per_page}', version,
+                                                lambda: render_recent_posts(None, None, per_page))
+    record_rows(recent['count'])
     
     return render_template('dashboard.html', 
-                         posts=posts, 
+                         recent=dict(recent, html=Markup(recent['html'])),
                          title='Dashboard',
                          user=user,
-                         all_users=all_users,
-                         recent_posts=recent_posts,
                          user_posts_count=user_posts_count,
                          admin_stats=admin_stats)
 
@@ -81,6 +115,7 @@ def register():
         user = User(username=form.username.data, email=form.email.data)
         db.session.add(user)
         db.session.commit()
+        analytics_cache().invalidate()
         flash(f'Account created for {form.username.data}! You can now create posts.', 'success')
         return redirect(url_for('main.dashboard'))
     return render_template('register.html', title='Register', form=form)
@@ -99,9 +134,23 @@ def new_post():
     form = PostForm()
     if form.validate_on_submit():
         if current_user:
-            post = Post(title=form.title.data, content=form.content.data, author=current_user)
-            db.session.add(post)
-            db.session.commit()
+            write_queue = current_app.extensions.get('write_queue')
+            if write_queue is not None:
+                # Group-committed with other requests' posts; returns once durable.
+                # End our read transaction first so waiting requests don't hold
+                # every pooled connection while the writer thread needs one.
+                author_id = current_user.id
+                db.session.rollback()
+                try:
+                    write_queue.submit(author_id, form.title.data, form.content.data)
+                except Exception as e:
+                    flash(f'Error creating post: {e}', 'danger')
+                    return render_template('create_post.html', title='New Post', form=form, user=current_user)
+            else:
+                post = Post(title=form.title.data, content=form.content.data, author=current_user)
+                db.session.add(post)
+                db.session.commit()
+            analytics_cache().invalidate()
             flash('Your post has been created!', 'success')
             # Redirect back to dashboard with the same user selected
             if user_id:
@@ -119,7 +168,8 @@ def user_profile(username):
     user = User.query.filter_by(username=username).first_or_404()
     
     # Get all posts by this user using direct query (for profile management)
-    user_posts = Post.query.filter_by(user_id=user.id).order_by(Post.date_posted.desc()).all()
+    user_posts = (Post.query.options(joinedload(Post.author))
+                  .filter_by(user_id=user.id).order_by(Post.date_posted.desc()).all())
     
     # Get user stats
     total_posts = len(user_posts)
@@ -143,10 +193,12 @@ def edit_user_profile(username):
 # --- READ-ONLY VIEWS EXCLUSIVELY ---
 
 @main.route("/views/users")
+@conditional_view
 def readonly_users():
     """READ-ONLY: User list using user stats view"""
     try:
         users = db.session.execute(text("SELECT * FROM v_user_stats ORDER BY post_count DESC")).fetchall()
+        record_rows(len(users))
         
         return render_template('readonly_users.html',
                              title='Users (Read-Only)',
@@ -156,19 +208,26 @@ def readonly_users():
         return redirect(url_for('main.admin_dashboard'))
 
 @main.route("/views/posts")
+@conditional_view
 def readonly_posts():
     """READ-ONLY: Posts list using post summary view"""
     try:
-        posts = db.session.execute(text("SELECT * FROM v_post_summary ORDER BY date_posted DESC LIMIT 50")).fetchall()
+        page = paginate_view(db.session, 'v_post_summary',
+                             before=request.args.get('before'),
+                             after=request.args.get('after'),
+                             per_page=request.args.get('per_page', 50, type=int))
+        record_rows(len(page.items))
         
         return render_template('readonly_posts.html',
                              title='Posts (Read-Only)',
-                             posts=posts)
+                             posts=page.items,
+                             page=page)
     except Exception as e:
         flash(f'Database views not found. Please populate database first. Error: {e}', 'warning')
         return redirect(url_for('main.admin_dashboard'))
 
 @main.route("/views/user/<username>")
+@conditional_view
 def readonly_user_profile(username):
     """READ-ONLY: User profile using views (no editing)"""
     try:
@@ -188,6 +247,7 @@ def readonly_user_profile(username):
             WHERE author_username = :username
             ORDER BY date_posted DESC
         """), {'username': username}).fetchall()
+        record_rows(len(user_posts))
         
         return render_template('readonly_user_profile.html',
                              title=f'{username} - Profile (Read-Only)',
@@ -199,88 +259,89 @@ def readonly_user_profile(username):
         flash(f'Error loading user profile: {e}', 'danger')
         return redirect(url_for('main.readonly_users'))
 
+@main.route("/search")
+def search_posts():
+    """READ-ONLY: Full-text post search backed by the post_fts index"""
+    query = request.args.get('q', '').strip()
+    search_type = request.args.get('type', 'content')
+    if search_type not in SEARCH_TYPES:
+        search_type = 'content'
+    page = max(request.args.get('page', 1, type=int), 1)
+    
+    try:
+        if query:
+            posts, count = run_search(db.session, query, search_type, page=page)
+        else:
+            posts, count = recent_posts(db.session), 0
+    except Exception as e:
+        flash(f'Error searching posts: {e}', 'danger')
+        posts, count = [], 0
+    record_rows(len(posts))
+    
+    search_info = {
+        'query': query,
+        'type': search_type,
+        'count': count,
+        'page': page,
+        'has_prev': page > 1,
+        'has_next': page * RESULTS_PER_PAGE < count
+    }
+    
+    return render_template('search_posts.html',
+                         title='Search Posts',
+                         posts=posts,
+                         search_info=search_info)
+
+@main.route("/api/users/suggest")
+def suggest_users_api():
+    """READ-ONLY: JSON username prefix matches for the dashboard user switcher"""
+    users = suggest_users(db.session, request.args.get('q', ''),
+                          limit=request.args.get('limit', SUGGEST_LIMIT, type=int))
+    record_rows(len(users))
+    return jsonify(users)
+
 # --- PANDAS ANALYTICS (READ-ONLY) ---
 
 @main.route("/analytics/dashboard")
 def analytics_dashboard():
-    """READ-ONLY: Advanced analytics dashboard using pandas"""
+    """READ-ONLY: Advanced analytics dashboard, served from the analytics cache"""
     try:
-        # Use read-only views for analytics
-        users_df = pd.read_sql("SELECT * FROM v_user_stats", db.engine)
-        posts_df = pd.read_sql("SELECT * FROM v_post_summary ORDER BY date_posted DESC", db.engine)
-        
-        # Convert date columns to datetime
-        if not posts_df.empty:
-            posts_df['date_posted'] = pd.to_datetime(posts_df['date_posted'])
-            posts_df['post_date'] = posts_df['date_posted'].dt.date
-            posts_df['post_month'] = posts_df['date_posted'].dt.to_period('M')
-        
-        # Calculate analytics
-        analytics = {}
-        
-        if not users_df.empty:
-            analytics['user_stats'] = {
-                'total_users': len(users_df),
-                'avg_posts_per_user': round(users_df['post_count'].mean(), 2),
-                'median_posts_per_user': users_df['post_count'].median(),
-                'most_active_user': users_df.loc[users_df['post_count'].idxmax()]['username'] if users_df['post_count'].max() > 0 else 'None',
-                'users_with_posts': len(users_df[users_df['post_count'] > 0]),
-                'users_without_posts': len(users_df[users_df['post_count'] == 0])
-            }
-        
-        if not posts_df.empty:
-            analytics['post_stats'] = {
-                'total_posts': len(posts_df),
-                'avg_content_length': round(posts_df['content_length'].mean(), 2),
-                'median_content_length': posts_df['content_length'].median(),
-                'longest_post': posts_df['content_length'].max(),
-                'shortest_post': posts_df['content_length'].min(),
-                'posts_last_7_days': len(posts_df[posts_df['date_posted'] > datetime.now() - timedelta(days=7)]),
-                'posts_last_30_days': len(posts_df[posts_df['date_posted'] > datetime.now() - timedelta(days=30)])
-            }
-            
-            # Top authors
-            top_authors = posts_df['author_username'].value_counts().head(5).to_dict()
-            analytics['top_authors'] = top_authors
-            
-            # Posts by month
-            if not posts_df.empty:
-                posts_by_month = posts_df.groupby('post_month').size().to_dict()
-                posts_by_month = {str(k): v for k, v in posts_by_month.items()}
-                analytics['posts_by_month'] = posts_by_month
+        # Aggregates are refreshed incrementally from posts newer than the cache watermark
+        analytics, users_data = analytics_cache().get(db.session)
         
         return render_template('analytics_dashboard.html',
                              title='Analytics Dashboard',
                              analytics=analytics,
-                             users_data=users_df.to_dict('records') if not users_df.empty else [],
-                             posts_data=posts_df.head(20).to_dict('records') if not posts_df.empty else [])
+                             users_data=users_data)
     
     except Exception as e:
         flash(f'Error generating analytics: {e}', 'danger')
         return redirect(url_for('main.admin_dashboard'))
 
+def activity_level(post_count):
+    """Activity bucket for the analytics export (same bins as the old pd.cut)"""
+    if not post_count:
+        return ''
+    if post_count == 1:
+        return 'Inactive'
+    if post_count <= 5:
+        return 'Low'
+    if post_count <= 10:
+        return 'Medium'
+    return 'High'
+
 @main.route("/analytics/export")
 def export_analytics():
-    """READ-ONLY: Export comprehensive analytics as CSV using pandas"""
+    """READ-ONLY: Stream comprehensive analytics as CSV"""
     try:
-        # Use read-only view for export
-        df = pd.read_sql("SELECT * FROM v_user_stats ORDER BY post_count DESC", db.engine)
+        # Use read-only view for export; yield_per keeps only one batch in memory
+        result = db.session.execute(text("SELECT * FROM v_user_stats ORDER BY post_count DESC"),
+                                    execution_options={'yield_per': EXPORT_BATCH_SIZE})
+        header = list(result.keys()) + ['activity_level']
+        rows = (list(row) + [activity_level(row.post_count)] for row in result)
         
-        if not df.empty:
-            # Add activity categories
-            df['activity_level'] = pd.cut(
-                df['post_count'], 
-                bins=[0, 1, 5, 10, float('inf')], 
-                labels=['Inactive', 'Low', 'Medium', 'High']
-            )
-        
-        # Export to CSV
-        output = df.to_csv(index=False)
-        response = make_response(output)
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = 'attachment; filename=microblog_analytics.csv'
-        
-        return response
+        return csv_response(header, rows, 'microblog_analytics.csv', compress=wants_gzip(request.args),
+                            on_complete=record_rows)
     
     except Exception as e:
         flash(f'Error exporting analytics: {e}', 'danger')
@@ -288,44 +349,30 @@ def export_analytics():
 
 @main.route("/analytics/user_report")
 def user_activity_report():
-    """READ-ONLY: Detailed user activity report using pandas"""
+    """READ-ONLY: Detailed user activity report, aggregated in SQL"""
+    try:
+        # Optional date range; the end date is inclusive
+        start = parse_date(request.args.get('start'))
+        end = parse_date(request.args.get('end'))
+    except ValueError:
+        flash('Dates must use the YYYY-MM-DD format.', 'warning')
+        start = end = None
+    
     try:
-        # Use read-only view for user activity analysis
-        df = pd.read_sql("SELECT * FROM v_post_summary ORDER BY date_posted DESC", db.engine)
+        user_summary, activity_patterns, total_posts = build_activity_report(
+            db.session, start, end + timedelta(days=1) if end else None)
         
-        if df.empty:
+        if not total_posts and not (start or end):
             flash('No post data available for analysis.', 'info')
             return redirect(url_for('main.analytics_dashboard'))
         
-        # Convert to datetime
-        df['date_posted'] = pd.to_datetime(df['date_posted'])
-        df['post_date'] = df['date_posted'].dt.date
-        df['post_month'] = df['date_posted'].dt.to_period('M')
-        df['post_hour'] = df['date_posted'].dt.hour
-        df['post_weekday'] = df['date_posted'].dt.day_name()
-        
-        # User activity summary
-        user_summary = df.groupby('author_username').agg({
-            'content_length': ['mean', 'sum', 'count'],
-            'post_date': ['min', 'max']
-        }).round(2)
-        
-        # Flatten column names
-        user_summary.columns = ['avg_content_length', 'total_content_length', 'post_count', 'first_post', 'latest_post']
-        user_summary = user_summary.reset_index()
-        
-        # Activity by time patterns
-        activity_patterns = {
-            'posts_by_weekday': df['post_weekday'].value_counts().to_dict(),
-            'posts_by_hour': df['post_hour'].value_counts().sort_index().to_dict(),
-            'posts_by_month': df['post_month'].value_counts().sort_index().to_dict()
-        }
-        
         return render_template('user_activity_report.html',
                              title='User Activity Report',
-                             user_summary=user_summary.to_dict('records'),
+                             user_summary=user_summary,
                              activity_patterns=activity_patterns,
-                             total_posts=len(df))
+                             total_posts=total_posts,
+                             start=start,
+                             end=end)
     
     except Exception as e:
         flash(f'Error generating user activity report: {e}', 'danger')
@@ -359,6 +406,7 @@ def create_empty_db():
             db.session.execute(text("DELETE FROM post;"))
             db.session.execute(text("DELETE FROM user;"))
         db.session.commit()
+        analytics_cache().reset()
         
         flash('Database cleared! All users and posts have been deleted.', 'warning')
         print("Database cleared successfully.")
@@ -394,6 +442,7 @@ def populate_db():
                 db.session.add(post)
         db.session.commit()
         print("Post table re-populated.")
+        analytics_cache().reset()
 
         flash('Database populated with new test data!', 'info')
     except Exception as e:
@@ -403,31 +452,67 @@ def populate_db():
 
     return redirect(url_for('main.admin_dashboard'))
 
+@main.route("/admin/bulk_seed")
+def bulk_seed_db():
+    """WRITE: Replace all data with a large generated dataset for load testing"""
+    try:
+        stats = bulk_seed(
+            num_users=request.args.get('users', 1000, type=int),
+            num_posts=request.args.get('posts', 100000, type=int),
+            start=parse_date(request.args.get('start')),
+            end=parse_date(request.args.get('end')),
+            batch_size=request.args.get('batch_size', DEFAULT_BATCH_SIZE, type=int),
+            seed=request.args.get('seed', type=int)
+        )
+        analytics_cache().reset()
+        
+        flash(f"Seeded {stats['users']} users and {stats['posts']} posts in {stats['seconds']}s "
+              f"({stats['posts_per_second']} posts/s).", 'info')
+        print(f"Bulk seed finished: {stats}")
+    except Exception as e:
+        flash(f'Error bulk seeding database: {e}', 'danger')
+        print(f"Error bulk seeding database: {e}")
+    
+    return redirect(url_for('main.admin_dashboard'))
+
+@main.route("/metrics")
+def metrics():
+    """Prometheus text-format metrics for a local scraper"""
+    return Response(current_app.extensions['metrics'].render(), content_type=METRICS_CONTENT_TYPE)
+
+@main.route("/admin/perf")
+def admin_perf():
+    """Per-endpoint query/DB/render timings and the slow query log (needs SQL_PROFILING)"""
+    profiler = current_app.extensions.get('request_profiler')
+    return render_template('admin_perf.html',
+                         title='Performance',
+                         profiler=profiler,
+                         endpoints=profiler.endpoint_summaries() if profiler else [],
+                         slow_queries=list(profiler.slow_queries) if profiler else [])
+
+@main.route("/admin/perf/reset")
+def reset_perf():
+    """Clear collected profiling data"""
+    profiler = current_app.extensions.get('request_profiler')
+    if profiler:
+        profiler.reset()
+        flash('Profiling data cleared.', 'info')
+    return redirect(url_for('main.admin_perf'))
+
 @main.route("/admin/export_users")
 def export_users():
-    """READ-ONLY: Export users using read-only view"""
+    """READ-ONLY: Stream users as CSV using read-only view"""
     try:
-        # Use read-only view for export
-        users = db.session.execute(text("SELECT * FROM v_user_stats ORDER BY post_count DESC")).fetchall()
-        
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['ID', 'Username', 'Email', 'Post Count', 'First Post', 'Latest Post'])
-        
-        # Write user data
-        for user in users:
-            writer.writerow([user.id, user.username, user.email, user.post_count, 
-                           user.first_post_date or 'N/A', user.last_post_date or 'N/A'])
+        # Use read-only view for export; yield_per keeps only one batch in memory
+        users = db.session.execute(text("SELECT * FROM v_user_stats ORDER BY post_count DESC"),
+                                   execution_options={'yield_per': EXPORT_BATCH_SIZE})
         
-        # Create response
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = 'attachment; filename=users_export.csv'
+        header = ['ID', 'Username', 'Email', 'Post Count', 'First Post', 'Latest Post']
+        rows = ([user.id, user.username, user.email, user.post_count,
+                 user.first_post_date or 'N/A', user.last_post_date or 'N/A'] for user in users)
         
-        return response
+        return csv_response(header, rows, 'users_export.csv', compress=wants_gzip(request.args),
+                            on_complete=record_rows)
     
     except Exception as e:
         flash(f'Error exporting users: {e}', 'danger')
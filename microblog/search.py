@@ -0,0 +1,119 @@
+# microblog_app/search.py
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import text
+
+SEARCH_TYPES = ('content', 'user', 'date')
+RESULTS_PER_PAGE = 20
+SUGGEST_LIMIT = 10
+MAX_SUGGEST_LIMIT = 25
+
+# Title matches count for more than body matches when ranking
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+
+# Control characters mark highlights inside snippets so the text can be
+# HTML-escaped before the real <mark> tags are put in
+_HIGHLIGHT_START = '\x02'
+_HIGHLIGHT_END = '\x03'
+_DATE_PREFIX = re.compile(r'^\d{4}(-\d{2}(-\d{2})?)?$')
+
+def build_match_expression(query):
+    """Turn free text into an FTS5 query: every word must appear, syntax is not interpreted"""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return ' '.join(f'"{term}"' for term in terms if term)
+
+def highlight_snippet(snippet):
+    """Escape a raw FTS snippet and wrap matched terms in <mark>"""
+    html = str(escape(snippet or ''))
+    html = html.replace(_HIGHLIGHT_START, '<mark>').replace(_HIGHLIGHT_END, '</mark>')
+    return Markup(html)
+
+def _prefix_range(prefix):
+    """Bounds for an index-friendly 'starts with' test on a text column"""
+    return prefix, prefix + '\uffff'
+
+def search_posts(session, query, search_type='content', page=1, per_page=RESULTS_PER_PAGE):
+    """
+    Search posts and return (rows, total_count).
+    content: bm25-ranked FTS5 match over title and content.
+    user: posts by usernames starting with the query, newest first.
+    date: posts whose date starts with YYYY, YYYY-MM or YYYY-MM-DD, newest first.
+    """
+    page = max(page, 1)
+    params = {'limit': per_page, 'offset': (page - 1) * per_page}
+    
+    if search_type == 'content':
+        match = build_match_expression(query)
+        if not match:
+            return [], 0
+        params['match'] = match
+        total = session.execute(text(
+            "SELECT COUNT(*) FROM post_fts WHERE post_fts MATCH :match"), params).scalar()
+        rows = session.execute(text(f"""
+            SELECT p.id, p.title, p.date_posted, u.username,
+                   snippet(post_fts, 1, '{_HIGHLIGHT_START}', '{_HIGHLIGHT_END}', '...', 24) as snippet
+            FROM post_fts
+            JOIN post p ON p.id = post_fts.rowid
+            JOIN user u ON u.id = p.user_id
+            WHERE post_fts MATCH :match
+            ORDER BY bm25(post_fts, {TITLE_WEIGHT}, {CONTENT_WEIGHT})
+            LIMIT :limit OFFSET :offset
+        """), params).fetchall()
+    
+    elif search_type == 'user':
+        params['low'], params['high'] = _prefix_range(query)
+        condition = "u.username >= :low AND u.username < :high"
+        total = session.execute(text(f"""
+            SELECT COUNT(*) FROM post p JOIN user u ON u.id = p.user_id WHERE {condition}
+        """), params).scalar()
+        rows = _plain_results(session, condition, params)
+    
+    elif search_type == 'date':
+        if not _DATE_PREFIX.match(query):
+            return [], 0
+        params['low'], params['high'] = _prefix_range(query)
+        condition = "p.date_posted >= :low AND p.date_posted < :high"
+        total = session.execute(text(f"SELECT COUNT(*) FROM post p WHERE {condition}"), params).scalar()
+        rows = _plain_results(session, condition, params)
+    
+    else:
+        raise ValueError(f"Unknown search type: {search_type}")
+    
+    return [_with_highlight(row) for row in rows], total
+
+def suggest_users(session, prefix, limit=SUGGEST_LIMIT):
+    """
+    Users whose name starts with prefix (case-insensitive), alphabetically.
+    A range scan on ix_user_username_nocase reads only the rows returned.
+    """
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+    low, high = _prefix_range(prefix)
+    rows = session.execute(text("""
+        SELECT id, username FROM user
+        WHERE username >= :low COLLATE NOCASE AND username < :high COLLATE NOCASE
+        ORDER BY username COLLATE NOCASE
+        LIMIT :limit
+    """), {'low': low, 'high': high, 'limit': max(1, min(limit, MAX_SUGGEST_LIMIT))}).fetchall()
+    return [{'id': row.id, 'username': row.username} for row in rows]
+
+def recent_posts(session, limit=RESULTS_PER_PAGE):
+    """Newest posts, shown on the search page before a query is entered"""
+    rows = _plain_results(session, "1 = 1", {'limit': limit, 'offset': 0})
+    return [_with_highlight(row) for row in rows]
+
+def _plain_results(session, condition, params):
+    return session.execute(text(f"""
+        SELECT p.id, p.title, p.date_posted, u.username, SUBSTR(p.content, 1, 200) as snippet
+        FROM post p JOIN user u ON u.id = p.user_id
+        WHERE {condition}
+        ORDER BY p.date_posted DESC, p.id DESC
+        LIMIT :limit OFFSET :offset
+    """), params).fetchall()
+
+def _with_highlight(row):
+    result = dict(row._mapping)
+    result['snippet'] = highlight_snippet(result['snippet'])
+    return result
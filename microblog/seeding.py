@@ -0,0 +1,255 @@
+# microblog_app/seeding.py
+import random
+import time
+from datetime import datetime, timedelta
+import click
+from faker import Faker
+from flask import current_app
+from flask.cli import with_appcontext
+from models import db, User
+from migrations import begin_schema_lock
+from pagination import SQLITE_DATETIME_FORMAT
+from rollups import clear_statements as rollup_clear_statements, rebuild_statements as rollup_rebuild_statements
+from write_version import VERSIONED_TABLES, POST_GENERATION, POST_GENERATION_TRIGGER, bump_statement, trigger_name
+from sqlalchemy import bindparam, text
+
+DEFAULT_BATCH_SIZE = 10000
+
+# Faker is far too slow to call once per row at load-test scale, so each run
+# draws a pool of generated text up front and samples from it
+TEXT_POOL_SIZE = 2000
+
+# Per-row post triggers that are suspended during a bulk load; the derived
+# tables they maintain are filled in set-wise before the transaction commits
+DEFERRED_POST_TRIGGERS = ('trg_post_fts_insert', 'trg_user_stats_post_insert', 'trg_post_rollup_insert',
+                          trigger_name('post', 'insert'), trigger_name('user', 'insert'))
+
+# Per-row delete triggers skipped when clearing; their tables are emptied wholesale
+CLEAR_SUSPENDED_TRIGGERS = ('trg_post_fts_delete', 'trg_user_stats_post_delete', 'trg_user_stats_user_delete',
+                            'trg_post_rollup_delete', trigger_name('post', 'delete'), trigger_name('user', 'delete'),
+                            POST_GENERATION_TRIGGER)
+
+FTS_DEFAULT_AUTOMERGE = 4
+
+class _TextPool:
+    """Pre-generated Faker text sampled with a seeded RNG"""
+
+    def __init__(self, fake, rng, size=TEXT_POOL_SIZE):
+        self.rng = rng
+        self.titles = [fake.sentence() for _ in range(size)]
+        self.paragraphs = [fake.paragraph() for _ in range(size)]
+        self.user_names = [fake.user_name() for _ in range(size)]
+        self.domains = [fake.free_email_domain() for _ in range(50)]
+
+    def title(self):
+        return self.rng.choice(self.titles)
+
+    def content(self):
+        return self.rng.choice(self.paragraphs)
+
+class _UserStatsDelta:
+    """Per-user counters for the rows this load inserts, merged into user_stats at the end"""
+
+    def __init__(self):
+        self.by_user = {}
+
+    def add(self, user_id, date_posted, content_length):
+        stats = self.by_user.get(user_id)
+        if stats is None:
+            self.by_user[user_id] = [1, date_posted, date_posted, content_length]
+        else:
+            stats[0] += 1
+            stats[1] = min(stats[1], date_posted)
+            stats[2] = max(stats[2], date_posted)
+            stats[3] += content_length
+
+    def rows(self):
+        for user_id, (count, first, last, length) in self.by_user.items():
+            yield {'user_id': user_id, 'count': count, 'first': first, 'last': last, 'length': length}
+
+def _batches(items, batch_size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _suspend_triggers(names):
+    """
+    Drop triggers inside the current transaction, returning their DDL to restore.
+    The transaction must already be open (begin_schema_lock): pysqlite doesn't
+    begin one for DDL, so a DROP issued first would autocommit on its own.
+    """
+    saved = dict(db.session.execute(text(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN :names"
+    ).bindparams(bindparam('names', expanding=True)), {'names': list(names)}).fetchall())
+    for name in saved:
+        db.session.execute(text(f"DROP TRIGGER {name}"))
+    return saved
+
+def _restore_triggers(saved):
+    for sql in saved.values():
+        db.session.execute(text(sql))
+
+def _bump_write_versions(saved, action):
+    """Record one write per table whose write_version trigger was suspended"""
+    for table in VERSIONED_TABLES:
+        if trigger_name(table, action) in saved:
+            db.session.execute(text(bump_statement(table)))
+
+def _clear_all():
+    """Empty post and user in one pass instead of firing delete triggers per row"""
+    saved = _suspend_triggers(CLEAR_SUSPENDED_TRIGGERS)
+    db.session.execute(text("DELETE FROM post"))
+    db.session.execute(text("DELETE FROM user_stats"))
+    db.session.execute(text("DELETE FROM user"))
+    if 'trg_post_fts_delete' in saved:
+        db.session.execute(text("INSERT INTO post_fts (post_fts) VALUES ('delete-all')"))
+    if 'trg_post_rollup_delete' in saved:
+        for stmt in rollup_clear_statements():
+            db.session.execute(text(stmt))
+    _bump_write_versions(saved, 'delete')
+    if POST_GENERATION_TRIGGER in saved:
+        db.session.execute(text(bump_statement(POST_GENERATION)))
+    _restore_triggers(saved)
+
+def bulk_seed(num_users, num_posts, start=None, end=None, batch_size=DEFAULT_BATCH_SIZE,
+              clear=True, seed=None, progress=None):
+    """
+    Insert num_users users and num_posts posts in a single transaction.
+    Posts get random authors and dates spread over [start, end]; rows are
+    sent with executemany in batch_size chunks. Returns a stats dict.
+    progress: optional callable(table, rows_inserted) for CLI feedback.
+    """
+    if num_users < 1 and num_posts > 0:
+        raise ValueError("At least one user is needed to own the posts.")
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=365)
+    if start >= end:
+        raise ValueError("Start date must be before end date.")
+
+    rng = random.Random(seed)
+    fake = Faker()
+    if seed is not None:
+        fake.seed_instance(seed)
+    pool = _TextPool(fake, rng)
+    started = time.perf_counter()
+
+    try:
+        # Hold the write lock from before the triggers are dropped until they
+        # are re-created: other connections can't write (or see the triggers
+        # missing) meanwhile, and a failed load rolls the drops back with it
+        begin_schema_lock()
+        if clear:
+            _clear_all()
+
+        saved_triggers = _suspend_triggers(DEFERRED_POST_TRIGGERS)
+        first_post_id = (db.session.execute(text("SELECT MAX(id) FROM post")).scalar() or 0) + 1
+
+        # Explicit ids let posts reference users without reading them back
+        first_user_id = (db.session.execute(text("SELECT MAX(id) FROM user")).scalar() or 0) + 1
+        user_ids = range(first_user_id, first_user_id + num_users)
+        created = datetime.utcnow()
+
+        users = ({'id': user_id,
+                  'username': f"{rng.choice(pool.user_names)[:12]}{user_id}",
+                  'email': f"user{user_id}@{rng.choice(pool.domains)}",
+                  'date_created': created} for user_id in user_ids)
+        inserted = 0
+        for batch in _batches(users, batch_size):
+            db.session.execute(User.__table__.insert(), batch)
+            inserted += len(batch)
+            if progress:
+                progress('user', inserted)
+
+        # Posts go in date order so the (date_posted, id) index is append-only.
+        # Plain tuples through the DB-API executemany skip per-row ORM/Core overhead.
+        span = (end - start).total_seconds()
+        offsets = sorted(rng.random() * span for _ in range(num_posts))
+        stats_delta = _UserStatsDelta()
+
+        def post_rows():
+            for offset in offsets:
+                content = pool.content()
+                date_posted = (start + timedelta(seconds=offset)).strftime(SQLITE_DATETIME_FORMAT)
+                user_id = rng.choice(user_ids)
+                stats_delta.add(user_id, date_posted, len(content))
+                yield (pool.title(), content, date_posted, user_id)
+
+        connection = db.session.connection()
+        inserted = 0
+        for batch in _batches(post_rows(), batch_size):
+            connection.exec_driver_sql(
+                "INSERT INTO post (title, content, date_posted, user_id) VALUES (?, ?, ?, ?)", batch)
+            inserted += len(batch)
+            if progress:
+                progress('post', inserted)
+
+        if 'trg_post_fts_insert' in saved_triggers:
+            # One set-wise index build; automerge off avoids repeated segment merges
+            db.session.execute(text("INSERT INTO post_fts (post_fts, rank) VALUES ('automerge', 0)"))
+            db.session.execute(text("""
+                INSERT INTO post_fts (rowid, title, content)
+                SELECT id, title, content FROM post WHERE id >= :first_id
+            """), {'first_id': first_post_id})
+            db.session.execute(text("INSERT INTO post_fts (post_fts, rank) VALUES ('automerge', :value)"),
+                               {'value': FTS_DEFAULT_AUTOMERGE})
+
+        if 'trg_user_stats_post_insert' in saved_triggers and stats_delta.by_user:
+            db.session.execute(text("""
+                UPDATE user_stats SET
+                    post_count = post_count + :count,
+                    total_content_length = total_content_length + :length,
+                    first_post_date = CASE WHEN first_post_date IS NULL OR :first < first_post_date
+                                           THEN :first ELSE first_post_date END,
+                    last_post_date = CASE WHEN last_post_date IS NULL OR :last > last_post_date
+                                          THEN :last ELSE last_post_date END
+                WHERE user_id = :user_id
+            """), list(stats_delta.rows()))
+
+        if 'trg_post_rollup_insert' in saved_triggers:
+            # Rollups are recomputed with a few GROUP BY passes over post
+            for stmt in rollup_rebuild_statements():
+                db.session.execute(text(stmt))
+
+        _bump_write_versions(saved_triggers, 'insert')
+        _restore_triggers(saved_triggers)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    elapsed = time.perf_counter() - started
+    return {
+        'users': num_users,
+        'posts': num_posts,
+        'seconds': round(elapsed, 2),
+        'posts_per_second': round(num_posts / elapsed) if elapsed else num_posts
+    }
+
+def parse_date(value):
+    """Parse YYYY-MM-DD (or None) for seeding options"""
+    return datetime.strptime(value, '%Y-%m-%d') if value else None
+
+@click.command('seed-db')
+@click.option('--users', 'num_users', default=1000, show_default=True, help='Users to create.')
+@click.option('--posts', 'num_posts', default=100000, show_default=True, help='Posts to create.')
+@click.option('--start', default=None, help='Earliest post date, YYYY-MM-DD (default: a year ago).')
+@click.option('--end', default=None, help='Latest post date, YYYY-MM-DD (default: now).')
+@click.option('--batch-size', default=DEFAULT_BATCH_SIZE, show_default=True, help='Rows per executemany call.')
+@click.option('--seed', type=int, default=None, help='Random seed for reproducible data.')
+@click.option('--append', is_flag=True, help='Keep existing data instead of clearing it first.')
+@with_appcontext
+def seed_db_command(num_users, num_posts, start, end, batch_size, seed, append):
+    """Bulk-load Faker users and posts for load testing."""
+    def report(table, count):
+        click.echo(f"  {table}: {count} rows", err=True)
+
+    stats = bulk_seed(num_users, num_posts, parse_date(start), parse_date(end),
+                      batch_size=batch_size, clear=not append, seed=seed, progress=report)
+    current_app.extensions['analytics_cache'].reset()
+    click.echo(f"Seeded {stats['users']} users and {stats['posts']} posts "
+               f"in {stats['seconds']}s ({stats['posts_per_second']} posts/s).")
@@ -0,0 +1,57 @@
+# microblog_app/streaming.py
+import csv
+import io
+import zlib
+from flask import Response, stream_with_context
+
+# Rows buffered per yielded chunk; keeps writes efficient without holding the table
+ROWS_PER_CHUNK = 500
+
+def csv_chunks(header, rows, rows_per_chunk=ROWS_PER_CHUNK, on_complete=None):
+    """Yield UTF-8 encoded CSV text a chunk of rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    
+    count = 0
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+    
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+    if on_complete:
+        on_complete(count)
+
+def gzip_chunks(chunks):
+    """Compress a byte stream on the fly into a single gzip member"""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)  # 16+ selects the gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def csv_response(header, rows, filename, compress=False, on_complete=None):
+    """
+    Stream rows to the client as a CSV download.
+    rows should be a lazy iterable (e.g. a yield_per result) so memory stays flat.
+    on_complete, if given, is called with the row count once the last row is written.
+    """
+    chunks = csv_chunks(header, rows, on_complete=on_complete)
+    mimetype = 'text/csv'
+    if compress:
+        chunks = gzip_chunks(chunks)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+    
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+def wants_gzip(args):
+    """True if the request asked for a gzip-compressed export (?gzip=1)"""
+    return args.get('gzip', '').lower() in ('1', 'true', 'yes')
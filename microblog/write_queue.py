@@ -0,0 +1,136 @@
+# microblog_app/write_queue.py
+import atexit
+import os
+import queue
+import threading
+import time
+from models import Post
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_DELAY_MS = 5.0
+# How long a request waits for its post to be committed before giving up
+DEFAULT_SUBMIT_TIMEOUT = 30.0
+
+class _PendingPost:
+    def __init__(self, values):
+        self.values = values
+        self.done = threading.Event()
+        self.post_id = None
+        self.error = None
+
+class PostWriteQueue:
+    """
+    Group commit for new posts. Requests hand their insert to one writer
+    thread per process and block until it is committed; the writer takes
+    whatever is queued (up to max_batch, waiting at most max_delay_ms for
+    more) and commits it as one transaction. SQLite then sees one writer
+    and one commit per group instead of a lock fight per request.
+    submit() returns only after the commit, so an acknowledged post is as
+    durable as one written directly.
+    """
+
+    def __init__(self, max_batch=DEFAULT_MAX_BATCH, max_delay_ms=DEFAULT_MAX_DELAY_MS,
+                 timeout=DEFAULT_SUBMIT_TIMEOUT, on_batch=None):
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self.timeout = timeout
+        self.on_batch = on_batch  # called with (posts, seconds) after each commit
+        self.engine = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, engine):
+        """Use this engine for writes; call inside an app context"""
+        self.engine = engine
+        atexit.register(self.close)
+
+    def submit(self, user_id, title, content, date_posted=None):
+        """Queue a post, wait for its group to commit and return the new post id"""
+        values = {'user_id': user_id, 'title': title, 'content': content}
+        if date_posted is not None:
+            values['date_posted'] = date_posted
+        pending = _PendingPost(values)
+        self._ensure_writer()
+        self._queue.put(pending)
+        if not pending.done.wait(self.timeout):
+            # The writer may still commit it later; the caller must not assume either way
+            raise TimeoutError(f"Post was not committed within {self.timeout}s")
+        if pending.error is not None:
+            raise pending.error
+        return pending.post_id
+
+    def close(self):
+        """Commit anything still queued and stop the writer thread"""
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            self._queue.put(None)
+            thread.join(self.timeout)
+
+    def _ensure_writer(self):
+        # Threads don't survive fork, so a preloaded gunicorn worker starts its own
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='post-writer', daemon=True)
+                self._thread.start()
+
+    def _next_group(self):
+        first = self._queue.get()
+        if first is None:
+            return None, True
+        group = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(group) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return group, True
+            group.append(item)
+        return group, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            group, stopping = self._next_group()
+            if group:
+                try:
+                    self._commit_group(group)
+                except Exception as e:
+                    # Keep the writer alive: a dying thread could still take the
+                    # next submit off the queue and strand it until the timeout
+                    print(f"Warning: post writer error after commit: {e}")
+
+    def _commit_group(self, group):
+        started = time.perf_counter()
+        try:
+            try:
+                self._insert(group)
+            except Exception:
+                # One bad row (e.g. its user was just deleted) shouldn't fail the
+                # whole group: retry each post on its own so only it reports the error.
+                for pending in group:
+                    try:
+                        self._insert([pending])
+                    except Exception as e:
+                        pending.error = e
+            if self.on_batch is not None:
+                self.on_batch(len(group), time.perf_counter() - started)
+        finally:
+            # Always wake the waiters, even if the metrics hook fails; otherwise
+            # their (already committed) posts would time out as failures
+            for pending in group:
+                pending.done.set()
+
+    def _insert(self, group):
+        table = Post.__table__
+        ids = []
+        with self.engine.begin() as conn:
+            for pending in group:
+                ids.append(conn.execute(table.insert().values(pending.values)).inserted_primary_key[0])
+        for pending, post_id in zip(group, ids):
+            pending.post_id = post_id
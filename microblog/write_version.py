@@ -0,0 +1,50 @@
+# microblog_app/write_version.py
+from datetime import datetime, timezone
+from typing import NamedTuple
+from sqlalchemy import text
+
+# A change counter per base table, bumped by triggers on every write. Readers
+# compare one tiny row instead of re-querying the data to learn whether
+# anything changed (HTTP validators, rendered fragment caches). The table and
+# triggers are created by migration 7 (migrations.py).
+VERSIONED_TABLES = ('user', 'post')
+
+# Extra counter bumped only when posts are deleted (migration 9). Post ids
+# restart at 1 after a wipe, so anything that tracks "posts with id > N" must
+# start over whenever this moves, even if the totals happen to match.
+POST_GENERATION = 'post_generation'
+POST_GENERATION_TRIGGER = 'trg_write_version_post_generation'
+
+_BUMP_SQL = """UPDATE write_version SET version = version + 1,
+                   updated_at = strftime('%Y-%m-%d %H:%M:%S', 'now')
+               WHERE name = '{table}'"""
+
+# schema_meta key of the random id migration 10 gives each database
+DATABASE_ID_KEY = 'database_id'
+
+class WriteVersion(NamedTuple):
+    token: str  # changes whenever any versioned table does; unique per database
+    last_modified: datetime  # UTC, whole seconds
+
+def trigger_name(table, action):
+    return f'trg_write_version_{table}_{action}'
+
+def bump_statement(table):
+    """SQL that records a write to table (for set-wise loads that suspend the triggers)"""
+    return _BUMP_SQL.format(table=table)
+
+def post_generation(session):
+    """Current post generation (0 before migration 9 has run)"""
+    return session.execute(text("SELECT version FROM write_version WHERE name = :name"),
+                           {'name': POST_GENERATION}).scalar() or 0
+
+def current_write_version(session):
+    """Combined version of all versioned tables, read from one small table"""
+    rows = session.execute(text("SELECT name, version, updated_at FROM write_version ORDER BY name")).fetchall()
+    # Counters alone repeat across databases seeded the same way
+    database_id = session.execute(text("SELECT value FROM schema_meta WHERE key = :key"),
+                                  {'key': DATABASE_ID_KEY}).scalar() or ''
+    token = database_id + ':' + '-'.join(f'{row.name}{row.version}' for row in rows)
+    last_modified = max((datetime.strptime(row.updated_at, '%Y-%m-%d %H:%M:%S') for row in rows),
+                        default=datetime(1970, 1, 1))
+    return WriteVersion(token, last_modified.replace(tzinfo=timezone.utc))
@@ -0,0 +1,7 @@
+# microblog_app/wsgi.py
+# WSGI entry point for multi-worker servers, e.g. from microblog/:
+#     gunicorn -w 4 wsgi:app
+# Kept apart from app.py so importing create_app (tests, benchmark.py) doesn't boot an app.
+from app import create_app
+
+app = create_app()
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# The app modules import each other by bare name (from models import db)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'microblog'))
+
+@pytest.fixture
+def app(tmp_path):
+    """App on a fresh database in tmp_path, seeded with 20 users and 500 posts"""
+    from app import create_app
+    from seeding import bulk_seed
+    app = create_app({'DATABASE_PATH': str(tmp_path / 'test.db'), 'WTF_CSRF_ENABLED': False})
+    with app.app_context():
+        bulk_seed(20, 500, seed=1)
+    return app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
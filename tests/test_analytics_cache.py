@@ -0,0 +1,43 @@
+import threading
+import time
+
+from analytics_cache import AnalyticsCache
+
+def test_reset_during_refresh_is_not_lost():
+    cache = AnalyticsCache()
+    refreshing = threading.Event()
+
+    def slow_refresh(session):
+        refreshing.set()
+        time.sleep(0.2)
+        return ({'stale': True}, [])
+
+    cache._refresh = slow_refresh
+    reader = threading.Thread(target=cache.get, args=(None,))
+    reader.start()
+    refreshing.wait()
+    cache.reset()
+    reader.join()
+    assert cache._result is None
+
+def test_same_size_reseed_from_another_connection_rebuilds(app, tmp_path):
+    from app import create_app
+    from models import db
+    from seeding import bulk_seed
+
+    cache = AnalyticsCache(ttl=0)
+    with app.app_context():
+        before, _ = cache.get(db.session)
+
+    # Another process (e.g. flask seed-db) replaces the data without touching this cache
+    other = create_app({'DATABASE_PATH': str(tmp_path / 'test.db')})
+    with other.app_context():
+        bulk_seed(20, 500, seed=2)
+
+    with app.app_context():
+        after, _ = cache.get(db.session)
+        fresh, _ = AnalyticsCache().get(db.session)
+    assert after['post_stats']['total_posts'] == before['post_stats']['total_posts']
+    assert after['post_stats'] == fresh['post_stats']
+    assert after['top_authors'] == fresh['top_authors']
+    assert after['top_authors'] != before['top_authors']
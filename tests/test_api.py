@@ -0,0 +1,21 @@
+def test_unknown_api_path_returns_json_404(client):
+    response = client.get('/api/v1/nope')
+    assert response.status_code == 404
+    assert response.is_json and 'error' in response.get_json()
+
+def test_wrong_method_returns_json_405(client):
+    response = client.post('/api/v1/posts')
+    assert response.status_code == 405
+    assert response.is_json and 'error' in response.get_json()
+    assert 'GET' in response.headers['Allow']
+
+def test_unknown_user_returns_json_404(client):
+    response = client.get('/api/v1/users/no-such-user')
+    assert response.status_code == 404
+    assert response.get_json() == {'error': 'User no-such-user not found.'}
+
+def test_pages_outside_the_api_keep_html_errors(client):
+    response = client.get('/no-such-page')
+    assert response.status_code == 404
+    assert response.mimetype == 'text/html'
+    assert client.get('/user/no-such-user').mimetype == 'text/html'
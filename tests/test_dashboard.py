@@ -0,0 +1,12 @@
+import re
+from html import unescape
+
+def test_pagination_links_keep_the_page_size(client):
+    html = client.get('/dashboard?per_page=7').get_data(as_text=True)
+    older = unescape(re.search(r'href="([^"]*before=[^"]*)"', html).group(1))
+    assert 'per_page=7' in older
+
+    html = client.get(older).get_data(as_text=True)
+    assert html.count('data-date=') == 7
+    newer = unescape(re.search(r'href="([^"]*after=[^"]*)"', html).group(1))
+    assert 'per_page=7' in newer
@@ -0,0 +1,46 @@
+import sqlite3
+
+from database_utilities import BlogWriter, add_blog_post, add_user, create_database
+
+def _count(path, table):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_create_database_then_batched_writes(tmp_path):
+    path = str(tmp_path / 'blog.db')
+    assert create_database(path)
+
+    with BlogWriter(path, batch_size=2, verbose=False) as writer:
+        assert writer.add_users(['alice', 'bob', 'carol']) == 3
+        assert writer.add_blog_posts([('hello', 1), ('hi', 2), ('hey', 3)]) == 3
+
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT u.username, p.post_message FROM blog_posts p "
+                        "JOIN users u ON u.userId = p.userId ORDER BY p.postId").fetchall()
+    conn.close()
+    assert rows == [('alice', 'hello'), ('bob', 'hi'), ('carol', 'hey')]
+
+def test_single_row_helpers(tmp_path):
+    path = str(tmp_path / 'blog.db')
+    create_database(path)
+    assert add_user(path, 'alice') == 'alice'
+    assert add_blog_post(path, 'first post', 1) == 1
+    assert _count(path, 'blog_posts') == 1
+
+def test_rejected_rows_do_not_stop_the_import(tmp_path):
+    path = str(tmp_path / 'blog.db')
+    create_database(path)
+    with BlogWriter(path, batch_size=2, verbose=False) as writer:
+        assert writer.add_users(['a', 'b', 'a', 'c', 'b', 'd']) == 4
+        assert [row for _, row, _ in writer.rejected] == [('a',), ('b',)]
+    assert _count(path, 'users') == 4
+
+def test_old_blog_posts_layout_is_reported(tmp_path):
+    path = str(tmp_path / 'blog.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE blog_posts (id INTEGER PRIMARY KEY, title TEXT, content TEXT, author TEXT)")
+    conn.close()
+    assert create_database(path) is False
@@ -0,0 +1,54 @@
+from fragment_cache import FragmentCache
+
+def test_dashboard_post_list_is_rendered_once_per_write(app, client):
+    fragments = app.extensions['fragment_cache']
+    first = client.get('/dashboard').get_data(as_text=True)
+    misses = fragments.misses
+    assert client.get('/dashboard').get_data(as_text=True) == first
+    assert fragments.misses == misses
+
+    response = client.post('/post/new?user_id=1', data={'title': 'Fresh fragment', 'content': 'new'})
+    assert response.status_code == 302
+    assert 'Fresh fragment' in client.get('/dashboard').get_data(as_text=True)
+    assert fragments.misses > misses
+
+def test_disk_backend_is_shared_between_instances(tmp_path):
+    first = FragmentCache(directory=str(tmp_path))
+    assert first.get_or_render('widget', 'v1', lambda: {'html': '<p>1</p>'}) == {'html': '<p>1</p>'}
+
+    second = FragmentCache(directory=str(tmp_path))
+    assert second.get_or_render('widget', 'v1', lambda: {'html': 'rendered again'}) == {'html': '<p>1</p>'}
+    assert (second.hits, second.misses) == (1, 0)
+
+    second.get_or_render('widget', 'v2', lambda: {'html': '<p>2</p>'})
+    assert len(list(tmp_path.glob('widget-*.json'))) == 1  # older version pruned
+
+def _newest_title(app):
+    from models import db
+    from sqlalchemy import text
+    with app.app_context():
+        return db.session.execute(text("SELECT title FROM post ORDER BY date_posted DESC, id DESC LIMIT 1")).scalar()
+
+def test_disk_entries_are_not_shared_between_databases(tmp_path):
+    from app import create_app
+    from seeding import bulk_seed
+
+    apps = []
+    for name, seed in (('a.db', 1), ('b.db', 2)):
+        app = create_app({'DATABASE_PATH': str(tmp_path / name), 'FRAGMENT_CACHE_DIR': str(tmp_path / 'fragments')})
+        with app.app_context():
+            bulk_seed(5, 50, seed=seed)  # same sizes, so the same write counters
+        apps.append(app)
+
+    for app in apps:
+        html = app.test_client().get('/dashboard').get_data(as_text=True)
+        assert _newest_title(app) in html
+    assert _newest_title(apps[0]) != _newest_title(apps[1])
+
+def test_out_of_range_page_sizes_share_one_entry(app, client):
+    fragments = app.extensions['fragment_cache']
+    client.get('/dashboard?per_page=100')
+    misses = fragments.misses
+    for per_page in (101, 5000, 123456):
+        client.get(f'/dashboard?per_page={per_page}')
+    assert fragments.misses == misses
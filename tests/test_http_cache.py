@@ -0,0 +1,21 @@
+def test_matching_etag_gets_empty_304(client):
+    first = client.get('/views/posts')
+    assert first.status_code == 200 and first.headers['ETag']
+
+    response = client.get('/views/posts', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == first.headers['ETag']
+
+def test_new_post_changes_the_etag(app, client):
+    etag = client.get('/views/posts').headers['ETag']
+
+    response = client.post('/post/new?user_id=1', data={'title': 'Bumps the etag', 'content': 'new'})
+    assert response.status_code == 302
+
+    # A fresh client: the first one has a pending flash message, which always renders
+    reader = app.test_client()
+    response = reader.get('/views/posts', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert 'Bumps the etag' in response.get_data(as_text=True)
@@ -0,0 +1,31 @@
+import re
+
+from sqlalchemy import text
+
+from instrumentation import count_queries
+from models import db
+
+def _statements(app, client, url):
+    client.get(url)  # warm per-process caches so both sides count the same work
+    with app.app_context():
+        engine = db.engine
+    with count_queries(engine) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return queries.count
+
+def test_dashboard_query_count_is_independent_of_page_size(app, client):
+    # First pages come from the fragment cache; cursor pages are always rendered live
+    html = client.get('/dashboard?per_page=5').get_data(as_text=True)
+    cursor = re.search(r'before=([^"&]+)', html).group(1)
+    small = _statements(app, client, f'/dashboard?per_page=5&before={cursor}')
+    large = _statements(app, client, f'/dashboard?per_page=100&before={cursor}')
+    assert small == large
+
+def test_profile_query_count_is_independent_of_post_count(app, client):
+    with app.app_context():
+        users = db.session.execute(text(
+            "SELECT u.username FROM user_stats s JOIN user u ON u.id = s.user_id "
+            "ORDER BY s.post_count, u.id")).scalars().all()
+    fewest, most = users[0], users[-1]
+    assert _statements(app, client, f'/user/{fewest}') == _statements(app, client, f'/user/{most}')
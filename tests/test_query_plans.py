@@ -0,0 +1,62 @@
+import re
+
+import pytest
+from sqlalchemy import event, text
+
+from models import db
+
+POST_SOURCES = re.compile(r'\bFROM (post|v_post_summary)\b', re.IGNORECASE)
+
+def _post_query_plans(app, client, url):
+    """EXPLAIN QUERY PLAN details for each statement on post issued while serving url"""
+    with app.app_context():
+        engine = db.engine
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+
+    plans = []
+    with engine.connect() as conn:
+        raw = conn.connection.driver_connection
+        for statement, parameters in statements:
+            if POST_SOURCES.search(statement):
+                plans.append([row[3] for row in raw.execute('EXPLAIN QUERY PLAN ' + statement, parameters)])
+    assert plans, f"{url} ran no query on post"
+    return plans
+
+def _assert_uses_index(plans, index_name):
+    details = [detail for plan in plans for detail in plan]
+    assert any(index_name in detail for detail in details), details
+    full_scans = [d for d in details if d.startswith('SCAN') and 'USING' not in d]
+    assert not full_scans, full_scans
+
+@pytest.fixture
+def username(app):
+    with app.app_context():
+        return db.session.execute(text("SELECT username FROM user ORDER BY id LIMIT 1")).scalar()
+
+def test_profile_posts_use_user_date_index(app, client, username):
+    _assert_uses_index(_post_query_plans(app, client, f'/user/{username}'), 'ix_post_user_id_date_posted')
+
+def test_user_posts_view_uses_user_date_index(app, client, username):
+    _assert_uses_index(_post_query_plans(app, client, f'/api/v1/users/{username}/posts'),
+                       'ix_post_user_id_date_posted')
+
+def test_dashboard_keyset_page_uses_date_index(app, client):
+    html = client.get('/dashboard?per_page=5').get_data(as_text=True)
+    cursor = re.search(r'before=([^"&]+)', html).group(1)
+    _assert_uses_index(_post_query_plans(app, client, f'/dashboard?per_page=5&before={cursor}'),
+                       'ix_post_date_posted_id')
+
+def test_post_view_pages_use_date_index(app, client):
+    _assert_uses_index(_post_query_plans(app, client, '/views/posts'), 'ix_post_date_posted_id')
+    cursor = client.get('/api/v1/posts?per_page=5').get_json()['cursors']['older']
+    _assert_uses_index(_post_query_plans(app, client, f'/views/posts?before={cursor}'), 'ix_post_date_posted_id')
@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy import text
+
+from models import db
+from seeding import bulk_seed
+
+class _LoadFailed(Exception):
+    pass
+
+def _fail_on_posts(table, count):
+    if table == 'post':
+        raise _LoadFailed()
+
+def _triggers():
+    return set(db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+
+def _post_count():
+    return db.session.execute(text("SELECT COUNT(*) FROM post")).scalar()
+
+@pytest.mark.parametrize('clear', [True, False])
+def test_failed_load_keeps_every_trigger(app, clear):
+    with app.app_context():
+        before = _triggers()
+        posts = _post_count()
+        with pytest.raises(_LoadFailed):
+            bulk_seed(5, 50, seed=2, clear=clear, progress=_fail_on_posts)
+        assert _triggers() == before
+        assert _post_count() == posts
+
+        # The triggers still fire for ordinary writes afterwards
+        db.session.execute(text("INSERT INTO post (title, content, date_posted, user_id) "
+                                "VALUES ('t', 'c', CURRENT_TIMESTAMP, 1)"))
+        db.session.commit()
+        assert db.session.execute(text("SELECT COALESCE(SUM(post_count), 0) FROM user_stats")).scalar() == posts + 1
@@ -0,0 +1,46 @@
+from sqlalchemy import text
+
+from models import db, Post
+from seeding import bulk_seed
+
+def _stored():
+    return {row.user_id: tuple(row[1:]) for row in db.session.execute(text("""
+        SELECT user_id, post_count, total_content_length, first_post_date, last_post_date
+        FROM user_stats WHERE post_count > 0""")).fetchall()}
+
+def _recomputed():
+    return {row.user_id: tuple(row[1:]) for row in db.session.execute(text("""
+        SELECT user_id, COUNT(*), SUM(LENGTH(content)), MIN(date_posted), MAX(date_posted)
+        FROM post GROUP BY user_id""")).fetchall()}
+
+def _assert_consistent(app):
+    with app.app_context():
+        assert _stored() == _recomputed()
+        users = db.session.execute(text("SELECT COUNT(*) FROM user")).scalar()
+        assert db.session.execute(text("SELECT COUNT(*) FROM user_stats")).scalar() == users
+
+def test_user_stats_follow_every_write_path(app, client):
+    _assert_consistent(app)
+
+    response = client.post('/post/new?user_id=3', data={'title': 'Counted', 'content': 'twelve chars'})
+    assert response.status_code == 302
+    _assert_consistent(app)
+
+    with app.app_context():
+        # Deleting a user's newest post moves last_post_date back as well
+        newest = db.session.execute(text(
+            "SELECT id FROM post WHERE user_id = 3 ORDER BY date_posted DESC LIMIT 1")).scalar()
+        db.session.delete(db.session.get(Post, newest))
+        db.session.commit()
+    _assert_consistent(app)
+
+    with app.app_context():
+        bulk_seed(5, 200, seed=4, clear=False)
+    _assert_consistent(app)
+
+    with app.app_context():
+        bulk_seed(8, 300, seed=5)
+    _assert_consistent(app)
+
+    assert client.get('/admin/create_empty_db').status_code == 302
+    _assert_consistent(app)
@@ -0,0 +1,85 @@
+import threading
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from models import db, User
+from write_queue import PostWriteQueue
+
+def _queue(app, **kwargs):
+    write_queue = PostWriteQueue(timeout=5, **kwargs)
+    with app.app_context():
+        write_queue.init_app(app, db.engine)
+    return write_queue
+
+def _post_counts(app):
+    with app.app_context():
+        return dict(db.session.execute(text("SELECT user_id, post_count FROM user_stats")).fetchall())
+
+def test_concurrent_submits_are_committed(app):
+    write_queue = _queue(app)
+    before = _post_counts(app)
+    ids, errors = [], []
+
+    def submit(user_id):
+        try:
+            for n in range(10):
+                ids.append(write_queue.submit(user_id, f'queued {user_id}-{n}', 'body'))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=submit, args=(user_id,)) for user_id in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    write_queue.close()
+
+    assert errors == []
+    assert len(set(ids)) == 80
+    with app.app_context():
+        rows = db.session.execute(text("SELECT id, user_id FROM post WHERE title LIKE 'queued %'")).fetchall()
+    assert sorted(row.id for row in rows) == sorted(ids)
+    after = _post_counts(app)
+    assert all(after[user_id] == before[user_id] + 10 for user_id in range(1, 9))
+
+def test_post_for_deleted_user_fails_alone(app):
+    with app.app_context():
+        user = User(username='gone', email='gone@example.com')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        db.session.delete(user)
+        db.session.commit()
+
+    write_queue = _queue(app, max_delay_ms=200)  # long enough for both posts to share a group
+    results = {}
+
+    def submit(key, author_id):
+        try:
+            results[key] = write_queue.submit(author_id, key, 'body')
+        except Exception as e:
+            results[key] = e
+
+    threads = [threading.Thread(target=submit, args=('orphan', user_id)),
+               threading.Thread(target=submit, args=('kept', 1))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    write_queue.close()
+
+    assert isinstance(results['orphan'], IntegrityError)
+    assert isinstance(results['kept'], int)
+
+def test_failing_batch_hook_does_not_strand_waiters(app):
+    def broken_hook(posts, seconds):
+        raise RuntimeError('metrics backend down')
+
+    write_queue = _queue(app, on_batch=broken_hook)
+    post_id = write_queue.submit(1, 'despite the hook', 'body')
+    with app.app_context():
+        assert db.session.execute(text("SELECT title FROM post WHERE id = :id"),
+                                  {'id': post_id}).scalar() == 'despite the hook'
+    assert isinstance(write_queue.submit(1, 'and again', 'body'), int)
+    write_queue.close()